@@ -0,0 +1,96 @@
+from firebase_admin import firestore
+from google.api_core.exceptions import AlreadyExists, Conflict
+from storage import UsernameTaken, valid_username
+
+USERNAMES = 'usernames'
+
+
+def legacy_users(db, username):
+    """Users with this username, found by the query used before the index existed."""
+    return list(db.collection('users').where('username', '==', username).limit(1).stream())
+
+
+def create_user(db, username, password):
+    """Creates the user and its usernames/{username} index in one atomic write.
+
+    The index is written with create(), so the whole batch fails if the
+    username is already taken. Users created before the index existed may
+    have no index document yet, so the old username query runs first; a
+    match is indexed for its user and the username refused.
+    """
+    legacy = legacy_users(db, username)
+    if legacy:
+        index_user(db, username, legacy[0])
+        raise UsernameTaken(username)
+    user_ref = db.collection('users').document()
+    batch = db.batch()
+    batch.create(db.collection(USERNAMES).document(username), {
+        'user_id': user_ref.id,
+        'password': password  # Mirrors users.password; use proper hashing in production
+    })
+    batch.set(user_ref, {
+        'username': username,
+        'password': password,  # In production, use proper password hashing
+        'created_at': firestore.SERVER_TIMESTAMP
+    })
+    try:
+        batch.commit()
+    except (AlreadyExists, Conflict):
+        raise UsernameTaken(username)
+    return user_ref.id
+
+
+def authenticate(db, username, password):
+    """Returns the user id for valid credentials, or None.
+
+    Looks up the username index with a single keyed get. Users created
+    before the index existed fall back to the old query and get indexed,
+    as do older usernames that cannot be document ids, which are never
+    indexed.
+    """
+    indexable = valid_username(username)
+    if indexable:
+        index = db.collection(USERNAMES).document(username).get()
+        if index.exists:
+            data = index.to_dict()
+            return data['user_id'] if data['password'] == password else None
+
+    query = db.collection('users').where('username', '==', username).where('password', '==', password).limit(1)
+    users = list(query.stream())
+    if not users:
+        return None
+    if indexable:
+        index_user(db, username, users[0])
+    return users[0].id
+
+
+def index_user(db, username, user):
+    """Creates the index document of a user from before the index; a no-op if one exists."""
+    try:
+        db.collection(USERNAMES).document(username).create({'user_id': user.id, 'password': user.get('password')})
+    except (AlreadyExists, Conflict):
+        pass
+
+
+def backfill_username_index(db):
+    """Creates missing usernames/{username} documents for existing users.
+
+    Returns (created, conflicts), where conflicts lists usernames shared by
+    more than one user, or not usable as a document id; the first user
+    seen keeps the index entry.
+    """
+    created = 0
+    conflicts = []
+    for user in db.collection('users').order_by('created_at').stream():
+        data = user.to_dict()
+        if not valid_username(data['username']):
+            conflicts.append(data['username'])
+            continue
+        index_ref = db.collection(USERNAMES).document(data['username'])
+        try:
+            index_ref.create({'user_id': user.id, 'password': data['password']})
+            created += 1
+        except (AlreadyExists, Conflict):
+            if index_ref.get().to_dict()['user_id'] != user.id:
+                conflicts.append(data['username'])
+    return created, conflicts
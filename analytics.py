@@ -0,0 +1,124 @@
+"""Trend analytics over a user's whole progress history.
+
+The history is loaded into a ProgressSeries once and resampled to one
+row per calendar day (UTC): the last weight logged that day, the calories
+summed and whether any workout was completed. The smoothed trend and the
+rolling averages are then computed over whole columns with pandas, so ten
+years of daily entries take milliseconds rather than a Python loop per
+entry. numpy and pandas are imported on first use.
+"""
+from datetime import timedelta
+from progress_series import ProgressSeries, day_date
+
+ANALYTICS_FIELDS = ['date', 'weight', 'calories_eaten', 'workout_completed']
+# Smoothing factor of the exponentially weighted weight trend, per day
+TREND_ALPHA = 0.1
+# Energy in a kilogram of body weight change
+KCAL_PER_KG = 7700
+# Days of trend and intake the TDEE and weekly rate are estimated from
+ESTIMATE_DAYS = 28
+MIN_ESTIMATE_DAYS = 7
+# Projections further out than this are not reported
+MAX_PROJECTION_DAYS = 3 * 365
+
+
+class ProgressAnalytics:
+    """Daily trend series and summary figures for one user's history.
+
+    Instances are immutable, so one can be shared between requests from
+    the analytics cache. Everything that depends on the profile, like the
+    goal projection, is computed per request in summary().
+    """
+
+    def __init__(self, series):
+        import numpy as np
+        import pandas as pd
+        # Averages and the trend are computed in float64 rather than the float32 of the series
+        frame = pd.DataFrame({'weight': series.weights().astype(np.float64), 'calories': series.calories(),
+                              'workout': series.workouts()}, index=series.days())
+        daily = frame.groupby(level=0).agg({'weight': 'last', 'calories': 'sum', 'workout': 'any'})
+        # Days without an entry stay in the grid as gaps, so windows are in calendar days
+        daily = daily.reindex(np.arange(daily.index[0], daily.index[-1] + 1))
+        weight = daily['weight']
+
+        self.days = daily.index.to_numpy()
+        self.trend = weight.ewm(alpha=TREND_ALPHA).mean().to_numpy()
+        self.weight_7 = weight.rolling(7, min_periods=1).mean().to_numpy()
+        self.weight_30 = weight.rolling(30, min_periods=1).mean().to_numpy()
+        calories_7 = daily['calories'].rolling(7, min_periods=1).mean()
+        calories_30 = daily['calories'].rolling(30, min_periods=1).mean()
+        logged = weight.notna().to_numpy()
+        workout = daily['workout'].fillna(False).to_numpy(dtype=bool)
+        recent = slice(-30, None)
+
+        self.rate, self.tdee = self._estimate(self.trend[-ESTIMATE_DAYS:],
+                                              daily['calories'].to_numpy()[-ESTIMATE_DAYS:],
+                                              logged[-ESTIMATE_DAYS:])
+        self.figures = {
+            'trend_weight': float(self.trend[-1]),
+            'weight_avg_7': _number(self.weight_7[-1]),
+            'weight_avg_30': _number(self.weight_30[-1]),
+            'calories_avg_7': _number(calories_7.iloc[-1]),
+            'calories_avg_30': _number(calories_30.iloc[-1]),
+            'logged_days': int(logged.sum()),
+            'adherence': float(workout.sum() / logged.sum()),
+            'adherence_30': float(workout[recent].sum() / logged[recent].sum()) if logged[recent].any() else None,
+            'weekly_rate': self.rate * 7 if self.rate is not None else None,
+            'tdee': self.tdee
+        }
+
+    @staticmethod
+    def _estimate(trend, calories, logged):
+        """Returns the trend slope (kg per day) and TDEE over the last days of history.
+
+        Energy balance: TDEE = mean intake - slope * KCAL_PER_KG, with the
+        intake averaged over the days that were logged.
+        """
+        import numpy as np
+        if len(trend) < MIN_ESTIMATE_DAYS or logged.sum() < MIN_ESTIMATE_DAYS:
+            return None, None
+        slope = float(np.polyfit(np.arange(len(trend)), trend, 1)[0])
+        intake = float(calories[logged].mean())
+        return slope, intake - slope * KCAL_PER_KG
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.days, self.trend, self.weight_7, self.weight_30)) + 1024
+
+    def trend_at(self, days):
+        """Interpolates the daily trend at the given epoch days, e.g. the charted points."""
+        import numpy as np
+        return np.interp(np.asarray(days, dtype=np.float64), self.days, self.trend)
+
+    def goal_date(self, goal_weight):
+        """Projected date the trend reaches goal_weight at the current rate, or None."""
+        if goal_weight is None:
+            return None
+        last_day = day_date(self.days[-1])
+        remaining = goal_weight - self.trend[-1]
+        if abs(remaining) < 0.05:
+            return last_day
+        if not self.rate or remaining * self.rate < 0:
+            # Not moving towards the goal
+            return None
+        days = remaining / self.rate
+        if days > MAX_PROJECTION_DAYS:
+            return None
+        return last_day + timedelta(days=float(days))
+
+    def summary(self, goal_weight=None):
+        """Summary figures for the analyze page, with the goal projection for goal_weight."""
+        return {**self.figures, 'goal_weight': goal_weight, 'goal_date': self.goal_date(goal_weight)}
+
+
+def _number(value):
+    """A float, or None for NaN (a window without entries)."""
+    return None if value != value else float(value)
+
+
+def progress_analytics(entries):
+    """Computes ProgressAnalytics for progress entries in date order, or None if there are none."""
+    series = ProgressSeries.from_entries(entries)
+    if not len(series):
+        return None
+    return ProgressAnalytics(series)
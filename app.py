@@ -1,414 +1,1110 @@
-from flask import Flask, render_template, request, redirect, url_for, session, send_file
-import firebase_admin
-from firebase_admin import credentials, firestore
-from google.generativeai import GenerativeModel
-import google.generativeai as genai
-from datetime import datetime
-import pandas as pd
-import plotly.express as px
-import os
-from dotenv import load_dotenv
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from io import BytesIO
-from pdf import create_fitness_plan_pdf, create_meal_plan_pdf
-# Load environment variables from .env
-load_dotenv()
-
-# Initialize Flask
-app = Flask(__name__)
-app.secret_key = 'your_secret_key'  # Change this to a secure secret key
-
-# Initialize Firebase (only if not already initialized)
-if not firebase_admin._apps:
-    cred = credentials.Certificate('./fit-tracker.json')
-    firebase_admin.initialize_app(cred)
-
-# Initialize Firestore
-db = firestore.client()
-
-# Set up Gemini API using the GOOGLE_API_KEY from the .env file
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-if not GOOGLE_API_KEY:
-    raise Exception("GOOGLE_API_KEY not found in environment variables")
-genai.configure(api_key=GOOGLE_API_KEY)
-@app.route('/')
-def home():
-    return render_template('home.html')
-
-@app.route('/register', methods=['GET', 'POST'])
-def register():
-    if request.method == 'POST':
-        username = request.form['username']
-        password = request.form['password']
-        confirm_password = request.form['confirm_password']
-        
-        if password != confirm_password:
-            return render_template('register.html', error="Passwords do not match")
-        
-        # Check if username exists
-        users_ref = db.collection('users')
-        query = users_ref.where('username', '==', username).limit(1)
-        
-        if len(list(query.stream())) > 0:
-            return render_template('register.html', error="Username already exists")
-        
-        try:
-            # Create new user
-            new_user = users_ref.document()
-            new_user.set({
-                'username': username,
-                'password': password,  # In production, use proper password hashing
-                'created_at': firestore.SERVER_TIMESTAMP
-            })
-            
-            # Set session
-            session['user_id'] = new_user.id
-            return redirect(url_for('profile'))
-            
-        except Exception as e:
-            return render_template('register.html', error=f"Registration failed: {str(e)}")
-    
-    return render_template('register.html')
-
-@app.route('/login', methods=['GET', 'POST'])
-def login():
-    if request.method == 'POST':
-        username = request.form['username']
-        password = request.form['password']
-        
-        users_ref = db.collection('users')
-        query = users_ref.where('username', '==', username).where('password', '==', password).limit(1)
-        
-        users = list(query.stream())
-        if users:
-            session['user_id'] = users[0].id
-            return redirect(url_for('profile'))
-        
-        return render_template('login.html', error="Invalid credentials")
-    
-    return render_template('login.html')
-# Add this route after the login route
-
-@app.route('/logout')
-def logout():
-    session.pop('user_id', None)  # Remove user_id from session
-    return redirect(url_for('login'))
-
-@app.route('/profile')
-def profile():
-    if 'user_id' not in session:
-        return redirect(url_for('login'))
-    
-    user_doc = db.collection('user_details').document(session['user_id']).get()
-    user_data = {}
-    
-    if user_doc.exists:
-        user_data = user_doc.to_dict()
-    
-    # Get recent progress
-    progress_ref = db.collection('progress')
-    recent_progress = progress_ref.where('user_id', '==', session['user_id']).order_by('date', direction=firestore.Query.DESCENDING).limit(5).stream()
-    
-    progress_list = []
-    for doc in recent_progress:
-        data = doc.to_dict()
-        progress_list.append({
-            'id': doc.id,  # Add this line to include the document ID
-            'date': data['date'].strftime('%Y-%m-%d'),
-            'weight': data['weight'],
-            'calories_eaten': data['calories_eaten'],
-            'workout_completed': data['workout_completed']
-        })
-    
-    return render_template('profile.html', user_data=user_data, progress=progress_list)
-
-@app.route('/delete_progress/<entry_id>', methods=['POST'])
-def delete_progress(entry_id):
-    if 'user_id' not in session:
-        return redirect(url_for('login'))
-        
-    try:
-        # Check if the progress entry belongs to the current user
-        progress_ref = db.collection('progress').document(entry_id)
-        progress_doc = progress_ref.get()
-        
-        if progress_doc.exists and progress_doc.to_dict()['user_id'] == session['user_id']:
-            progress_ref.delete()
-            
-    except Exception as e:
-        print(f"Error deleting progress entry: {e}")
-        
-    return redirect(url_for('profile'))
-
-
-@app.route('/edit_profile', methods=['GET', 'POST'])
-def edit_profile():
-    if 'user_id' not in session:
-        return redirect(url_for('login'))
-    
-    if request.method == 'POST':
-        user_details = {
-            'user_id': session['user_id'],
-            'name': request.form['name'],
-            'age': int(request.form['age']),
-            'height': float(request.form['height']),
-            'weight': float(request.form['weight']),
-            'work_type': request.form['work_type'],
-            'goal': request.form['goal'],
-            'current_calories': int(request.form['current_calories']),
-            'workout_split': request.form['workout_split'],
-            'updated_at': firestore.SERVER_TIMESTAMP
-        }
-        
-        db.collection('user_details').document(session['user_id']).set(user_details)
-        
-        # Generate workout plan
-        plan = generate_workout_plan(user_details)
-        db.collection('user_details').document(session['user_id']).update({
-            'plan': plan
-        })
-        
-        return redirect(url_for('profile'))
-    
-    # Get existing user details
-    user_doc = db.collection('user_details').document(session['user_id']).get()
-    user_data = user_doc.to_dict() if user_doc.exists else {}
-    
-    return render_template('edit_profile.html', user_data=user_data)
-
-
-
-@app.route('/view_plan')
-def view_plan():
-    if 'user_id' not in session:
-        return redirect(url_for('login'))
-    
-    user_doc = db.collection('user_details').document(session['user_id']).get()
-    
-    if user_doc.exists:
-        user_data = user_doc.to_dict()
-        plan = user_data.get('plan', 'No plan generated yet.')
-        return render_template('plan.html', plan=plan)
-    else:
-        return redirect(url_for('profile'))
-
-@app.route('/progress', methods=['GET', 'POST'])
-def progress():
-    if 'user_id' not in session:
-        return redirect(url_for('login'))
-    
-    if request.method == 'POST':
-        progress_data = {
-            'user_id': session['user_id'],
-            'date': datetime.now(),
-            'weight': float(request.form['weight']),
-            'calories_eaten': int(request.form['calories_eaten']),
-            'workout_completed': request.form['workout_completed'],
-            'created_at': firestore.SERVER_TIMESTAMP
-        }
-        
-        db.collection('progress').add(progress_data)
-        return redirect(url_for('analyze'))
-    
-    return render_template('progress.html', current_date=datetime.now())
-@app.route('/analyze')
-def analyze():
-    if 'user_id' not in session:
-        return redirect(url_for('login'))
-    
-    progress_ref = db.collection('progress')
-    query = progress_ref.where('user_id', '==', session['user_id']).order_by('date')
-    
-    progress_data = []
-    dates = []
-    weights = []
-    calories = []
-    
-    for doc in query.stream():
-        data = doc.to_dict()
-        dates.append(data['date'].strftime('%b %d'))
-        weights.append(data['weight'])
-        calories.append(data['calories_eaten'])
-        progress_data.append(data)
-    
-    stats = {
-        'total_workouts': len(progress_data),
-        'weight_change': weights[-1] - weights[0] if weights else 0,
-        'avg_calories': sum(calories) / len(calories) if calories else 0
-    }
-    
-    return render_template('analyze.html',
-                         stats=stats,
-                         dates=dates,
-                         weights=weights,
-                         calories=calories)
-@app.route('/download_plan')
-def download_plan():
-    if 'user_id' not in session:
-        return redirect(url_for('login'))
-    
-    user_doc = db.collection('user_details').document(session['user_id']).get()
-    
-    if not user_doc.exists:
-        return "No plan found", 404
-    
-    user_data = user_doc.to_dict()
-    plan = user_data.get('plan', 'No plan available')
-    
-    # Use the enhanced PDF generator
-    buffer = create_fitness_plan_pdf(user_data, plan)
-    
-    return send_file(
-        buffer,
-        download_name='FitTracker_Workout_Plan.pdf',
-        as_attachment=True,
-        mimetype='application/pdf'
-    )
-    
-
-def generate_workout_plan(user_details):
-    try:
-        prompt = f"""
-        Create a detailed workout plan for someone with the following characteristics:
-        - Height: {user_details.get('height')} cm
-        - Weight: {user_details.get('weight')} kg
-        - Activity Level: {user_details.get('work_type')}
-        - Fitness Goal: {user_details.get('goal')}
-        - Daily Calorie Target: {user_details.get('current_calories')}
-        - Preferred Workout Split: {user_details.get('workout_split')}
-
-        Please provide a comprehensive plan that includes:
-        1. Weekly schedule breakdown
-        2. Specific exercises for each day
-        3. Sets and reps for each exercise
-        4. Rest periods
-        5. Nutrition recommendations
-        6. Progress tracking tips
-        """
-
-        model = GenerativeModel('gemini-pro')
-        response = model.generate_content(prompt)
-        return response.text
-
-    except Exception as e:
-        print(f"Error generating workout plan: {str(e)}")
-        return generate_fallback_plan(user_details)
-
-def generate_fallback_plan(user_details):
-    return f"""
-    BASIC WORKOUT PLAN (Fallback)
-    
-    Goal: {user_details.get('goal')}
-    Split: {user_details.get('workout_split')}
-    
-    Weekly Schedule:
-    Monday: Upper Body
-    - Bench Press: 3x8-12
-    - Shoulder Press: 3x8-12
-    - Rows: 3x8-12
-    
-    Wednesday: Lower Body
-    - Squats: 3x8-12
-    - Deadlifts: 3x8-12
-    - Lunges: 3x8-12
-    
-    Friday: Full Body
-    - Pull-ups: 3x8-12
-    - Push-ups: 3x8-12
-    - Leg Press: 3x8-12
-    
-    Daily Calorie Target: {user_details.get('current_calories')}
-    """
-# Update the generate_meal_plan function to accept diet_preference and allergies
-def generate_meal_plan(user_details, diet_preference, allergies):
-    try:
-        prompt = f"""
-        Create a detailed meal plan for an athlete with these details:
-        - Diet Preference: {diet_preference}
-        - Allergies / Additional Info: {allergies}
-        - Height: {user_details.get('height')} cm
-        - Weight: {user_details.get('weight')} kg
-        - Activity Level: {user_details.get('work_type')}
-        - Fitness Goal: {user_details.get('goal')}
-        - Daily Calorie Target: {user_details.get('current_calories')}
-        
-        Provide a comprehensive meal plan including:
-        1. Breakfast, Lunch, Dinner, and Snacks
-        2. Specific foods with portion sizes and nutritional info
-        3. Timing and preparation tips
-        4. Healthy substitutions and variety
-        """
-        model = GenerativeModel('gemini-pro')
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        print(f"Error generating meal plan: {str(e)}")
-        return "Could not generate a meal plan at this time. Please try again later."
-
-# Update the meal_suggester route to send these new details
-@app.route('/meal_suggester', methods=['GET', 'POST'])
-def meal_suggester():
-    if 'user_id' not in session:
-        return redirect(url_for('login'))
-    
-    user_doc = db.collection('user_details').document(session['user_id']).get()
-    if not user_doc.exists:
-        return redirect(url_for('edit_profile'))
-    user_data = user_doc.to_dict()
-    
-    if request.method == 'POST':
-        try:
-            diet_pref = request.form.get('diet_preference', 'veg')
-            allergies = request.form.get('allergies', '')
-            
-            # Store preferences in database
-            db.collection('user_details').document(session['user_id']).update({
-                'diet_preference': diet_pref,
-                'allergies': allergies,
-                'updated_at': firestore.SERVER_TIMESTAMP
-            })
-            
-            # Generate meal plan
-            meal_plan_text = generate_meal_plan(user_data, diet_pref, allergies)
-            
-            # Store the meal plan
-            db.collection('user_details').document(session['user_id']).update({
-                'meal_plan': meal_plan_text
-            })
-            
-            return redirect(url_for('meal_suggester'))
-        
-        except Exception as e:
-            print(f"Error generating meal plan: {str(e)}")
-            return redirect(url_for('meal_suggester', error='generation_failed'))
-    
-    return render_template('meal_suggester.html', user_data=user_data)
-
-@app.route('/download_meal_plan')
-def download_meal_plan():
-    if 'user_id' not in session:
-        return redirect(url_for('login'))
-    
-    user_doc = db.collection('user_details').document(session['user_id']).get()
-    if not user_doc.exists:
-        return "No meal plan found", 404
-    
-    user_data = user_doc.to_dict()
-    meal_plan = user_data.get('meal_plan')
-    
-    if not meal_plan:
-        return "No meal plan available", 404
-    
-    # Generate PDF
-    pdf_buffer = create_meal_plan_pdf(meal_plan, user_data)
-    
-    return send_file(
-        pdf_buffer,
-        download_name='FitTracker_Meal_Plan.pdf',
-        as_attachment=True,
-        mimetype='application/pdf'
-    )
-
-if __name__ == '__main__':
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, g, current_app
+from datetime import datetime, timedelta, timezone
+import os
+import time
+import csv
+import json
+import shutil
+import tempfile
+import threading
+import click
+from io import StringIO
+from dotenv import load_dotenv
+from pdf_spec import PROFILE_FIELDS
+from pdf_cache import PdfCache, pdf_cache_key
+from pdf_service import PdfRenderService, RenderUnavailable
+from llm import get_model, use_fake_model, close_stream, generative_clients
+from jobs import JobQueue
+from plan_cache import PlanCache, MemoryCacheBackend, FirestoreCacheBackend, plan_cache_key
+from singleflight import SingleFlight
+from ratelimit import GenerationLimiter, GenerationRejected
+from streaming import sse_event, stream_chunks, sse_response, iter_chunks, iter_zip
+from charts import parse_range, downsample_series
+from storage import open_storage, valid_username, SERVER_TIMESTAMP, UsernameTaken
+from progress_import import import_format, read_rows, import_rows
+from progress_export import EXPORT_FIELDS, iter_progress_csv, iter_progress_parquet
+from analytics import ANALYTICS_FIELDS, progress_analytics
+from progress_series import ProgressSeries, day_date
+from unit_of_work import UnitOfWork
+from profile_cache import ProfileCache
+# Load environment variables from .env
+load_dotenv()
+
+# Storage for users, profiles and progress: Firestore, or SQLite for a single node
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'firestore')
+
+# Firestore clients per worker process, and how often an idle one is health-checked
+FIRESTORE_POOL_SIZE = int(os.getenv('FIRESTORE_POOL_SIZE', 2))
+CLIENT_CHECK_INTERVAL = int(os.getenv('CLIENT_CHECK_INTERVAL', 60))
+
+# Firestore batches an import or bulk delete commits in parallel
+WRITE_WORKERS = int(os.getenv('WRITE_WORKERS', 4))
+
+# Cache of generated plans, keyed by their prompt inputs
+PLAN_CACHE_TTL = int(os.getenv('PLAN_CACHE_TTL', 7 * 24 * 3600))
+if os.getenv('PLAN_CACHE_BACKEND', 'memory') == 'firestore' and STORAGE_BACKEND == 'firestore':
+    plan_cache = PlanCache(FirestoreCacheBackend(lambda: get_storage().db, ttl=PLAN_CACHE_TTL))
+else:
+    plan_cache = PlanCache(MemoryCacheBackend(
+        max_entries=int(os.getenv('PLAN_CACHE_SIZE', 512)), ttl=PLAN_CACHE_TTL
+    ))
+
+# Identical generations already in flight are shared, not repeated
+plan_flights = SingleFlight(timeout=int(os.getenv('PLAN_FLIGHT_TIMEOUT', 120)))
+
+# Shared cache of user_details documents across requests; writes from other
+# workers are seen once an entry expires, or by fresh reads
+profile_cache = ProfileCache(
+    max_bytes=int(os.getenv('PROFILE_CACHE_BYTES', 16 * 1024 * 1024)),
+    ttl=int(os.getenv('PROFILE_CACHE_TTL', 300))
+)
+
+# Trend analytics per user, dropped on every progress write made by this process
+# and recomputed when the rollup totals differ from the ones they were built from
+ANALYTICS_ROLLUP_FIELDS = ('count', 'last_date', 'weight_sum', 'calories_sum', 'workouts_completed')
+analytics_cache = ProfileCache(
+    max_bytes=int(os.getenv('ANALYTICS_CACHE_BYTES', 32 * 1024 * 1024)),
+    ttl=int(os.getenv('ANALYTICS_CACHE_TTL', 300))
+)
+
+# Rendered PDFs, keyed by a hash of their inputs
+pdf_cache = PdfCache(max_bytes=int(os.getenv('PDF_CACHE_BYTES', 64 * 1024 * 1024)))
+
+# ReportLab rendering runs in a process pool; PDF_RENDER_WORKERS=0 renders inline
+pdf_renderer = PdfRenderService(
+    workers=int(os.getenv('PDF_RENDER_WORKERS', 2)),
+    timeout=int(os.getenv('PDF_RENDER_TIMEOUT', 30)),
+    max_pending=int(os.getenv('PDF_RENDER_MAX_PENDING', 16))
+)
+
+# Progress entries included in the download bundle
+BUNDLE_PROGRESS_ROWS = int(os.getenv('BUNDLE_PROGRESS_ROWS', 365))
+
+# Entries per row group in Parquet exports; bounds the memory an export uses
+EXPORT_ROW_GROUP_SIZE = int(os.getenv('EXPORT_ROW_GROUP_SIZE', 64 * 1024))
+
+# Upper bound on points sent to the analyze chart per series
+CHART_MAX_POINTS = int(os.getenv('CHART_MAX_POINTS', 300))
+CHART_FIELDS = ['date', 'weight', 'calories_eaten']
+
+# Entries per page from /api/progress, and the most a client may ask for
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', 100))
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 500))
+
+# Admission control in front of the Gemini client
+GENERATION_TIMEOUT = int(os.getenv('GENERATION_TIMEOUT', 60))
+generation_limiter = GenerationLimiter(
+    max_in_flight=int(os.getenv('GENERATION_MAX_IN_FLIGHT', 4)),
+    requests_per_minute=int(os.getenv('GENERATION_RPM', 60)),
+    max_queue=int(os.getenv('GENERATION_MAX_QUEUE', 32)),
+    max_retries=int(os.getenv('GENERATION_MAX_RETRIES', 3))
+)
+
+# Background workers for plan generation, and how long an exiting worker
+# process waits for them; keep it under gunicorn's graceful_timeout
+plan_jobs = JobQueue(workers=int(os.getenv('PLAN_WORKERS', 2)))
+PLAN_DRAIN_TIMEOUT = int(os.getenv('PLAN_DRAIN_TIMEOUT', 20))
+
+# Clients are created on first use, not at import
+_storage = None
+_storage_lock = threading.Lock()
+
+def get_storage():
+    """Returns the storage backend, connecting to it on first use."""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                storage = open_storage(STORAGE_BACKEND, sqlite_path=os.getenv('SQLITE_PATH', 'fittracker.db'),
+                                       pool_size=FIRESTORE_POOL_SIZE, check_interval=CLIENT_CHECK_INTERVAL,
+                                       write_workers=WRITE_WORKERS)
+                _storage = storage
+    return _storage
+
+def after_fork():
+    """Drops clients, pools and threads inherited from the parent process.
+
+    Called from gunicorn's post_fork hook so that every worker opens its own
+    gRPC channels; see gunicorn.conf.py.
+    """
+    global _storage, _storage_lock
+    _storage = None
+    _storage_lock = threading.Lock()
+    generative_clients.after_fork()
+    pdf_renderer.after_fork()
+    plan_jobs.after_fork()
+
+def shutdown_clients():
+    """Closes this process's connections and render pool when a worker exits.
+
+    Plan jobs get PLAN_DRAIN_TIMEOUT seconds to finish first. The queue is
+    in memory, so the profiles of jobs still unfinished are marked failed
+    rather than left 'generating' with nothing to finish them.
+    """
+    for job in plan_jobs.drain(PLAN_DRAIN_TIMEOUT):
+        try:
+            get_storage().write_docs([('user_details', job['owner'], 'update', {'plan_status': 'failed'})])
+        except Exception as e:
+            print(f"Error marking plan job {job['id']} as failed: {e}")
+        profile_cache.invalidate(job['owner'])
+    storage = _storage
+    if storage is not None and hasattr(storage, 'clients'):
+        storage.clients.close()
+    generative_clients.close()
+    pdf_renderer.shutdown()
+
+# Views are collected here and registered by create_app()
+routes = []
+
+def route(rule, **options):
+    def decorator(view_func):
+        routes.append((rule, view_func, options))
+        return view_func
+    return decorator
+
+def get_uow():
+    """Returns the unit of work for the current request."""
+    if 'uow' not in g:
+        g.uow = UnitOfWork(get_storage(), caches={'user_details': profile_cache})
+    return g.uow
+
+def commit_uow(response):
+    # Buffered writes go out as one batch at the end of the request
+    uow = g.pop('uow', None)
+    if uow is not None:
+        uow.commit()
+        response.headers['X-Doc-Reads'] = str(uow.reads)
+        response.headers['X-Doc-Writes'] = str(uow.writes)
+        response.headers['X-Doc-Commits'] = str(uow.commits)
+    return response
+
+@route('/')
+def home():
+    return render_template('home.html')
+
+@route('/register', methods=['GET', 'POST'])
+def register():
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        confirm_password = request.form['confirm_password']
+        
+        if password != confirm_password:
+            return render_template('register.html', error="Passwords do not match")
+        
+        if not valid_username(username):
+            return render_template('register.html', error="Invalid username")
+        
+        try:
+            # Create new user; fails atomically if the username is taken
+            session['user_id'] = get_storage().create_user(username, password)
+            return redirect(url_for('profile'))
+            
+        except UsernameTaken:
+            return render_template('register.html', error="Username already exists")
+        except Exception as e:
+            return render_template('register.html', error=f"Registration failed: {str(e)}")
+    
+    return render_template('register.html')
+
+@route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        
+        user_id = get_storage().authenticate(username, password)
+        if user_id:
+            session['user_id'] = user_id
+            return redirect(url_for('profile'))
+        
+        return render_template('login.html', error="Invalid credentials")
+    
+    return render_template('login.html')
+# Add this route after the login route
+
+@route('/logout')
+def logout():
+    session.pop('user_id', None)  # Remove user_id from session
+    return redirect(url_for('login'))
+
+@route('/profile')
+def profile():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    user_data = get_uow().get('user_details', session['user_id']) or {}
+    
+    # Get recent progress
+    progress_list = recent_progress_list(get_storage().recent_progress(session['user_id'], 5))
+    
+    return render_template('profile.html', user_data=user_data, progress=progress_list)
+
+def recent_progress_list(entries):
+    """Formats progress entries for the profile page."""
+    progress_list = []
+    for data in entries:
+        progress_list.append({
+            'id': data['id'],  # Add this line to include the document ID
+            'date': data['date'].strftime('%Y-%m-%d'),
+            'weight': data['weight'],
+            'calories_eaten': data['calories_eaten'],
+            'workout_completed': data['workout_completed']
+        })
+    return progress_list
+
+@route('/delete_progress/<entry_id>', methods=['POST'])
+def delete_progress(entry_id):
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+        
+    try:
+        # Only deletes the entry if it belongs to the current user
+        get_storage().delete_progress(session['user_id'], entry_id)
+            
+    except Exception as e:
+        print(f"Error deleting progress entry: {e}")
+    finally:
+        analytics_cache.invalidate(session['user_id'])
+        
+    return redirect(url_for('profile'))
+
+@route('/delete_progress', methods=['POST'])
+def delete_progress_entries():
+    """Deletes the entry_id entries listed in the form, or every entry from start to end (YYYY-MM-DD)."""
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    entry_ids = request.form.getlist('entry_id')
+    if not entry_ids:
+        try:
+            start = datetime.strptime(request.form.get('start', ''), '%Y-%m-%d')
+            end = datetime.strptime(request.form.get('end', ''), '%Y-%m-%d')
+        except ValueError:
+            return "Choose entries to delete or a date range", 400
+    
+    try:
+        if entry_ids:
+            get_storage().delete_progress_many(session['user_id'], entry_ids=entry_ids)
+        else:
+            # Include the whole of the last day
+            end = end.replace(hour=23, minute=59, second=59, microsecond=999999)
+            get_storage().delete_progress_many(session['user_id'], start=start, end=end)
+    except Exception as e:
+        print(f"Error deleting progress entries: {e}")
+    finally:
+        analytics_cache.invalidate(session['user_id'])
+    
+    return redirect(url_for('profile'))
+
+@route('/delete_account', methods=['POST'])
+def delete_account():
+    """Deletes the account with its profile, progress and rollups once the password is confirmed."""
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    user_id = session['user_id']
+    storage = get_storage()
+    user = storage.get_doc('users', user_id)
+    if user is None or storage.authenticate(user['username'], request.form.get('password', '')) != user_id:
+        return "Incorrect password", 403
+    
+    storage.delete_user(user_id)
+    profile_cache.invalidate(user_id)
+    analytics_cache.invalidate(user_id)
+    session.pop('user_id', None)
+    return redirect(url_for('register'))
+
+
+@route('/edit_profile', methods=['GET', 'POST'])
+def edit_profile():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    if request.method == 'POST':
+        user_details = {
+            'user_id': session['user_id'],
+            'name': request.form['name'],
+            'age': int(request.form['age']),
+            'height': float(request.form['height']),
+            'weight': float(request.form['weight']),
+            'work_type': request.form['work_type'],
+            'goal': request.form['goal'],
+            'goal_weight': float(request.form['goal_weight']) if request.form.get('goal_weight') else None,
+            'current_calories': int(request.form['current_calories']),
+            'workout_split': request.form['workout_split'],
+            'updated_at': SERVER_TIMESTAMP
+        }
+        
+        if request.form.get('stream'):
+            # The plan page streams the plan from /stream/plan
+            get_uow().set('user_details', session['user_id'], user_details)
+            return redirect(url_for('view_plan', stream=1))
+        
+        user_details['plan_status'] = 'generating'
+        get_uow().set('user_details', session['user_id'], user_details)
+        # The job updates this document, so the profile must be saved first
+        get_uow().commit()
+        
+        # Generate workout plan in the background
+        session['plan_job_id'] = plan_jobs.submit(
+            run_plan_job, session['user_id'], user_details, owner=session['user_id']
+        )
+        
+        return redirect(url_for('profile'))
+    
+    # Get existing user details
+    user_data = get_uow().get('user_details', session['user_id']) or {}
+    
+    return render_template('edit_profile.html', user_data=user_data)
+
+
+
+@route('/view_plan')
+def view_plan():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    # The plan may have been stored by a job on another worker
+    user_data = get_uow().get('user_details', session['user_id'], fresh=True)
+    
+    if user_data is not None:
+        generating = user_data.get('plan_status') == 'generating'
+        if generating:
+            plan = user_data.get('plan', 'Your plan is being generated. This page will update when it is ready.')
+        else:
+            plan = user_data.get('plan', 'No plan generated yet.')
+        return render_template('plan.html', plan=plan, generating=generating,
+                               job_id=session.get('plan_job_id'),
+                               stream=request.args.get('stream') == '1')
+    else:
+        return redirect(url_for('profile'))
+
+@route('/plan_status/<job_id>')
+def plan_status(job_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    job = plan_jobs.status(job_id)
+    if job is None or job['owner'] != session['user_id']:
+        # Job may have run on another worker, fall back to the stored status
+        user_data = get_uow().get('user_details', session['user_id'], fresh=True)
+        status = user_data.get('plan_status', 'ready') if user_data is not None else 'unknown'
+        return jsonify({'id': job_id, 'status': status})
+    
+    return jsonify({
+        'id': job['id'],
+        'status': job['status'],
+        'error': job['error']
+    })
+
+@route('/progress', methods=['GET', 'POST'])
+def progress():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    if request.method == 'POST':
+        get_storage().add_progress(progress_form_entry(session['user_id'], request.form))
+        analytics_cache.invalidate(session['user_id'])
+        return redirect(url_for('analyze'))
+    
+    return render_template('progress.html', current_date=datetime.now())
+
+def progress_form_entry(user_id, form):
+    """Builds a progress entry from the submitted progress form."""
+    return {
+        'user_id': user_id,
+        'date': datetime.now(),
+        'weight': float(form['weight']),
+        'calories_eaten': int(form['calories_eaten']),
+        'workout_completed': form['workout_completed'],
+        'created_at': SERVER_TIMESTAMP
+    }
+
+@route('/progress/import', methods=['POST'])
+def import_progress():
+    """Imports progress entries from an uploaded CSV or JSON file.
+
+    Returns the import report as JSON, or streams a 'progress' event per
+    written batch and a final 'done' event when the client accepts
+    text/event-stream.
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'error': 'No file uploaded'}), 400
+    file_format = request.form.get('format') or import_format(upload.filename)
+    
+    if request.accept_mimetypes.best_match(['application/json', 'text/event-stream']) == 'text/event-stream':
+        # The request closes its files before a streamed response is read
+        spool = tempfile.TemporaryFile()
+        shutil.copyfileobj(upload.stream, spool)
+        spool.seek(0)
+        reports = import_rows(get_storage(), session['user_id'], read_rows(spool, file_format))
+        
+        user_id = session['user_id']
+        
+        def events():
+            try:
+                for report in reports:
+                    analytics_cache.invalidate(user_id)
+                    yield sse_event(json.dumps(report), event='done' if report['done'] else 'progress')
+            except (ValueError, csv.Error) as e:
+                yield sse_event(f"Could not read the file: {e}", event='error')
+            finally:
+                analytics_cache.invalidate(user_id)
+        return sse_response(events(), on_close=spool.close)
+    
+    reports = import_rows(get_storage(), session['user_id'], read_rows(upload.stream, file_format))
+    report = {}
+    try:
+        for report in reports:
+            pass
+    except (ValueError, csv.Error) as e:
+        return jsonify({**report, 'error': f"Could not read the file: {e}"}), 400
+    finally:
+        analytics_cache.invalidate(session['user_id'])
+    return jsonify(report)
+
+@route('/analyze')
+def analyze():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    # Chart series only cover the requested date range
+    start, end = parse_range(request.args)
+    entries = get_storage().progress_range(session['user_id'], start, end, CHART_FIELDS)
+    
+    # Summary stats come from the rollup (Firestore) or an indexed aggregate (SQLite)
+    rollup = get_storage().progress_summary(session['user_id'])
+    
+    # Trends cover the whole history and are cached until the rollup shows it changed
+    analytics = user_analytics(session['user_id'], rollup)
+    goal_weight = (get_uow().get('user_details', session['user_id']) or {}).get('goal_weight')
+    
+    return render_template('analyze.html', **analyze_context(entries, rollup, start, end, analytics, goal_weight))
+
+def user_analytics(user_id, rollup):
+    """ProgressAnalytics over the user's whole history, from the cache when possible; None without entries.
+
+    Cached analytics are kept with the rollup totals they were computed
+    against and recomputed once the rollup no longer matches, so writes
+    handled by another worker are picked up without waiting for the TTL.
+    """
+    key = tuple(rollup.get(field) for field in ANALYTICS_ROLLUP_FIELDS)
+    hit, cached = analytics_cache.lookup(user_id)
+    if hit and cached[0] == key:
+        return cached[1]
+    generation = analytics_cache.generation(user_id)
+    analytics = progress_analytics(get_storage().iter_progress(user_id, ANALYTICS_FIELDS))
+    analytics_cache.put(user_id, (key, analytics), generation, size=analytics.nbytes if analytics else 64)
+    return analytics
+
+def analyze_context(entries, rollup, start, end, analytics=None, goal_weight=None):
+    """Template variables for the analyze page: chart series and summary stats."""
+    series = ProgressSeries.from_entries(entries)
+    days = series.days()
+    
+    # Long ranges are downsampled so the payload stays bounded
+    keep = downsample_series(days, [series.weights(), series.calories()], CHART_MAX_POINTS)
+    date_format = '%b %d, %Y' if (end - start).days > 365 else '%b %d'
+    dates = [day_date(day).strftime(date_format) for day in days[keep]]
+    # The series holds float32 weights, which the trend is computed from; rounding drops the conversion noise
+    weights = series.weights()[keep].astype('float64').round(4).tolist()
+    calories = series.calories()[keep].tolist()
+    trend = analytics.trend_at(days[keep]).round(4).tolist() if analytics and len(keep) else []
+    
+    count = rollup['count']
+    stats = {
+        'total_workouts': count,
+        'weight_change': rollup['last_weight'] - rollup['first_weight'] if count else 0,
+        'avg_calories': rollup['calories_sum'] / count if count else 0
+    }
+    if analytics is not None:
+        stats.update(analytics.summary(goal_weight))
+    
+    return dict(stats=stats,
+                dates=dates,
+                weights=weights,
+                trend=trend,
+                calories=calories,
+                range_from=start.strftime('%Y-%m-%d'),
+                range_to=end.strftime('%Y-%m-%d'))
+
+@route('/api/progress')
+def api_progress():
+    """Progress history as JSON columns, a page at a time.
+
+    Without updated_since, entries come newest first. With updated_since
+    (epoch milliseconds, or the sync_token of an earlier response) only
+    entries created after it are returned, oldest first, and the response
+    carries a new sync_token for the next sync. Pass next_cursor as cursor
+    to get the following page; it is null on the last page. Deleted
+    entries are not reported.
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    since = request.args.get('updated_since')
+    order = 'date' if since is None else 'created_at'
+    position = request.args.get('cursor') or since
+    try:
+        limit = min(max(int(request.args.get('limit', API_PAGE_SIZE)), 1), API_MAX_PAGE_SIZE)
+        after, after_id = parse_progress_cursor(position)
+    except (ValueError, OverflowError):
+        return jsonify({'error': 'Invalid limit, cursor or updated_since'}), 400
+    
+    entries = get_storage().progress_page(session['user_id'], limit, order, after, after_id)
+    last = entries[-1] if entries else None
+    
+    body = {
+        'count': len(entries),
+        'next_cursor': progress_cursor(last[order], last['id']) if len(entries) == limit else None,
+        'columns': {
+            'id': [entry['id'] for entry in entries],
+            'date': [epoch_ms(entry['date']) for entry in entries],
+            'weight': [entry['weight'] for entry in entries],
+            'calories_eaten': [entry['calories_eaten'] for entry in entries],
+            'workout_completed': [entry['workout_completed'] for entry in entries],
+            'created_at': [epoch_ms(entry['created_at']) for entry in entries]
+        }
+    }
+    if since is not None:
+        body['sync_token'] = progress_cursor(last['created_at'], last['id']) if last else position
+    return jsonify(body)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def epoch_us(value):
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+def epoch_ms(value):
+    return epoch_us(value) // 1000
+
+def progress_cursor(value, entry_id):
+    """Opaque page position: the sort value in microseconds and the entry id."""
+    return f"{epoch_us(value)}:{entry_id}"
+
+def parse_progress_cursor(value):
+    """Returns (after, after_id) for a cursor, or for a plain epoch-milliseconds time."""
+    if not value:
+        return None, None
+    if ':' in value:
+        micros, entry_id = value.split(':', 1)
+        if not entry_id:
+            raise ValueError(value)
+        return EPOCH + timedelta(microseconds=int(micros)), entry_id
+    return EPOCH + timedelta(milliseconds=float(value)), None
+
+@route('/download_plan')
+def download_plan():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    user_data = get_uow().get('user_details', session['user_id'])
+    
+    if user_data is None:
+        return "No plan found", 404
+    
+    plan = user_data.get('plan', 'No plan available')
+    
+    # Use the enhanced PDF generator
+    return send_cached_pdf('fitness', plan, user_data, 'FitTracker_Workout_Plan.pdf')
+
+def cached_pdf(kind, content, user_data, etag=None):
+    """Returns (pdf_bytes, last_modified) from the render cache, rendering on a miss."""
+    etag = etag or pdf_cache_key(kind, content, user_data, PROFILE_FIELDS[kind])
+    entry = pdf_cache.get(etag)
+    if entry is None:
+        entry = pdf_cache.put(etag, pdf_renderer.render(kind, content, user_data))
+    return entry
+
+def send_cached_pdf(kind, content, user_data, download_name):
+    """Sends a PDF from the render cache, answering conditional GETs with 304."""
+    etag = pdf_cache_key(kind, content, user_data, PROFILE_FIELDS[kind])
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        response.cache_control.private = True
+        return response
+    
+    try:
+        data, last_modified = cached_pdf(kind, content, user_data, etag)
+    except RenderUnavailable as e:
+        print(f"Error rendering PDF: {str(e)}")
+        return "PDF generation is busy, please try again shortly", 503
+    
+    # Stream slices of the shared buffer; the length is known, so no chunked encoding
+    response = current_app.response_class(iter_chunks(data), mimetype='application/pdf', direct_passthrough=True)
+    response.content_length = len(data)
+    response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    response.cache_control.private = True
+    return response.make_conditional(request)
+    
+
+def recent_progress_rows(user_id, limit):
+    """Returns the user's latest progress entries, oldest first, as plain rows."""
+    rows = []
+    for data in get_storage().recent_progress(user_id, limit):
+        rows.append({
+            'date': data['date'].strftime('%Y-%m-%d'),
+            'weight': data['weight'],
+            'calories_eaten': data['calories_eaten'],
+            'workout_completed': data['workout_completed']
+        })
+    rows.reverse()
+    return rows
+
+def progress_rows_csv(rows):
+    output = StringIO()
+    writer = csv.DictWriter(output, fieldnames=['date', 'weight', 'calories_eaten', 'workout_completed'])
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue().encode('utf-8')
+
+@route('/download_bundle')
+def download_bundle():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    # One profile read serves every document in the bundle
+    user_data = get_uow().get('user_details', session['user_id'])
+    if user_data is None:
+        return "No plan found", 404
+    
+    plan = user_data.get('plan', 'No plan available')
+    meal_plan = user_data.get('meal_plan', 'No meal plan available')
+    progress_rows = recent_progress_rows(session['user_id'], BUNDLE_PROGRESS_ROWS)
+    
+    if request.args.get('format') == 'zip':
+        # Both documents are rendered before the response starts, so a busy
+        # renderer is a 503 rather than a truncated archive
+        try:
+            files = [
+                ('FitTracker_Workout_Plan.pdf', cached_pdf('fitness', plan, user_data)[0]),
+                ('FitTracker_Meal_Plan.pdf', cached_pdf('meal', meal_plan, user_data)[0]),
+                ('progress.csv', progress_rows_csv(progress_rows))
+            ]
+        except RenderUnavailable as e:
+            print(f"Error rendering PDF: {str(e)}")
+            return "PDF generation is busy, please try again shortly", 503
+        
+        response = current_app.response_class(iter_zip(files), mimetype='application/zip')
+        response.headers.set('Content-Disposition', 'attachment', filename='FitTracker_Bundle.zip')
+        response.cache_control.private = True
+        return response
+    
+    content = {'plan': plan, 'meal_plan': meal_plan, 'progress': progress_rows}
+    return send_cached_pdf('bundle', content, user_data, 'FitTracker_Bundle.pdf')
+
+@route('/export/progress.csv')
+def export_progress_csv():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    entries = get_storage().iter_progress(session['user_id'], EXPORT_FIELDS)
+    return export_response(iter_progress_csv(entries), 'text/csv', 'FitTracker_Progress.csv')
+
+@route('/export/progress.parquet')
+def export_progress_parquet():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    entries = get_storage().iter_progress(session['user_id'], EXPORT_FIELDS)
+    return export_response(iter_progress_parquet(entries, EXPORT_ROW_GROUP_SIZE),
+                           'application/vnd.apache.parquet', 'FitTracker_Progress.parquet')
+
+def export_response(chunks, mimetype, filename):
+    """Streams an export; the history is read from storage as the client downloads it."""
+    response = current_app.response_class(chunks, mimetype=mimetype)
+    response.headers.set('Content-Disposition', 'attachment', filename=filename)
+    response.cache_control.private = True
+    return response
+
+@route('/metrics')
+def metrics():
+    return jsonify({
+        'generation': generation_limiter.stats(),
+        'plan_cache': plan_cache.stats(),
+        'profile_cache': profile_cache.stats(),
+        'analytics_cache': analytics_cache.stats(),
+        'pdf_cache': pdf_cache.stats(),
+        'plan_jobs_queued': plan_jobs.queue.qsize(),
+        'firestore_clients': _storage.clients.stats() if hasattr(_storage, 'clients') else None,
+        'llm_clients': generative_clients.stats(),
+        'generations_in_flight': plan_flights.in_flight()
+    })
+
+def run_plan_job(user_id, user_details):
+    """Background job: generates the workout plan and stores it on the profile."""
+    try:
+        plan = generate_workout_plan(user_details)
+    except Exception:
+        get_storage().write_docs([('user_details', user_id, 'update', {'plan_status': 'failed'})])
+        profile_cache.invalidate(user_id)
+        raise
+    get_storage().write_docs([('user_details', user_id, 'update', {
+        'plan': plan,
+        'plan_status': 'ready'
+    })])
+    profile_cache.invalidate(user_id)
+
+def workout_plan_inputs(user_details):
+    return {
+        'height': user_details.get('height'),
+        'weight': user_details.get('weight'),
+        'work_type': user_details.get('work_type'),
+        'goal': user_details.get('goal'),
+        'current_calories': user_details.get('current_calories'),
+        'workout_split': user_details.get('workout_split')
+    }
+
+def workout_plan_prompt(user_details):
+    return f"""
+        Create a detailed workout plan for someone with the following characteristics:
+        - Height: {user_details.get('height')} cm
+        - Weight: {user_details.get('weight')} kg
+        - Activity Level: {user_details.get('work_type')}
+        - Fitness Goal: {user_details.get('goal')}
+        - Daily Calorie Target: {user_details.get('current_calories')}
+        - Preferred Workout Split: {user_details.get('workout_split')}
+
+        Please provide a comprehensive plan that includes:
+        1. Weekly schedule breakdown
+        2. Specific exercises for each day
+        3. Sets and reps for each exercise
+        4. Rest periods
+        5. Nutrition recommendations
+        6. Progress tracking tips
+        """
+
+def generate_workout_plan(user_details):
+    inputs = workout_plan_inputs(user_details)
+    cached = plan_cache.get('workout', inputs)
+    if cached is not None:
+        return cached
+    
+    try:
+        prompt = workout_plan_prompt(user_details)
+
+        def generate():
+            # A flight that finished just before this one started has cached the plan
+            cached = plan_cache.get('workout', inputs)
+            if cached is not None:
+                return cached
+            model = get_model('gemini-pro')
+            response = generation_limiter.call(
+                lambda: model.generate_content(prompt), timeout=GENERATION_TIMEOUT
+            )
+            plan_cache.set('workout', inputs, response.text)
+            return response.text
+
+        return plan_flights.do(plan_cache_key('workout', inputs), generate)
+
+    except Exception as e:
+        print(f"Error generating workout plan: {str(e)}")
+        return generate_fallback_plan(user_details)
+
+def generate_fallback_plan(user_details):
+    return f"""
+    BASIC WORKOUT PLAN (Fallback)
+    
+    Goal: {user_details.get('goal')}
+    Split: {user_details.get('workout_split')}
+    
+    Weekly Schedule:
+    Monday: Upper Body
+    - Bench Press: 3x8-12
+    - Shoulder Press: 3x8-12
+    - Rows: 3x8-12
+    
+    Wednesday: Lower Body
+    - Squats: 3x8-12
+    - Deadlifts: 3x8-12
+    - Lunges: 3x8-12
+    
+    Friday: Full Body
+    - Pull-ups: 3x8-12
+    - Push-ups: 3x8-12
+    - Leg Press: 3x8-12
+    
+    Daily Calorie Target: {user_details.get('current_calories')}
+    """
+# Update the generate_meal_plan function to accept diet_preference and allergies
+def meal_plan_inputs(user_details, diet_preference, allergies):
+    return {
+        'diet_preference': diet_preference,
+        'allergies': allergies,
+        'height': user_details.get('height'),
+        'weight': user_details.get('weight'),
+        'work_type': user_details.get('work_type'),
+        'goal': user_details.get('goal'),
+        'current_calories': user_details.get('current_calories')
+    }
+
+def meal_plan_prompt(user_details, diet_preference, allergies):
+    return f"""
+        Create a detailed meal plan for an athlete with these details:
+        - Diet Preference: {diet_preference}
+        - Allergies / Additional Info: {allergies}
+        - Height: {user_details.get('height')} cm
+        - Weight: {user_details.get('weight')} kg
+        - Activity Level: {user_details.get('work_type')}
+        - Fitness Goal: {user_details.get('goal')}
+        - Daily Calorie Target: {user_details.get('current_calories')}
+        
+        Provide a comprehensive meal plan including:
+        1. Breakfast, Lunch, Dinner, and Snacks
+        2. Specific foods with portion sizes and nutritional info
+        3. Timing and preparation tips
+        4. Healthy substitutions and variety
+        """
+
+def generate_meal_plan(user_details, diet_preference, allergies):
+    inputs = meal_plan_inputs(user_details, diet_preference, allergies)
+    cached = plan_cache.get('meal', inputs)
+    if cached is not None:
+        return cached
+    
+    try:
+        prompt = meal_plan_prompt(user_details, diet_preference, allergies)
+        def generate():
+            # A flight that finished just before this one started has cached the plan
+            cached = plan_cache.get('meal', inputs)
+            if cached is not None:
+                return cached
+            model = get_model('gemini-pro')
+            response = generation_limiter.call(
+                lambda: model.generate_content(prompt), timeout=GENERATION_TIMEOUT
+            )
+            plan_cache.set('meal', inputs, response.text)
+            return response.text
+
+        return plan_flights.do(plan_cache_key('meal', inputs), generate)
+    except Exception as e:
+        print(f"Error generating meal plan: {str(e)}")
+        return "Could not generate a meal plan at this time. Please try again later."
+
+# Update the meal_suggester route to send these new details
+@route('/meal_suggester', methods=['GET', 'POST'])
+def meal_suggester():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    user_data = get_uow().get('user_details', session['user_id'])
+    if user_data is None:
+        return redirect(url_for('edit_profile'))
+    
+    if request.method == 'POST':
+        try:
+            diet_pref = request.form.get('diet_preference', 'veg')
+            allergies = request.form.get('allergies', '')
+            
+            # Store preferences in database
+            get_uow().update('user_details', session['user_id'], {
+                'diet_preference': diet_pref,
+                'allergies': allergies,
+                'updated_at': SERVER_TIMESTAMP
+            })
+            
+            if request.form.get('stream'):
+                # The page streams the meal plan from /stream/meal_plan
+                return redirect(url_for('meal_suggester', stream=1))
+            
+            # Generate meal plan
+            meal_plan_text = generate_meal_plan(user_data, diet_pref, allergies)
+            
+            # Store the meal plan
+            get_uow().update('user_details', session['user_id'], {
+                'meal_plan': meal_plan_text
+            })
+            
+            return redirect(url_for('meal_suggester'))
+        
+        except Exception as e:
+            print(f"Error generating meal plan: {str(e)}")
+            return redirect(url_for('meal_suggester', error='generation_failed'))
+    
+    return render_template('meal_suggester.html', user_data=user_data,
+                           stream=request.args.get('stream') == '1')
+
+def stream_generation(kind, inputs, prompt, on_complete):
+    """Streams a plan to the client as Server-Sent Events.
+
+    Cached plans are sent as a single event. Otherwise the model's streaming
+    API is used under the generation limiter, and on_complete(text) stores
+    the assembled plan once the stream finishes.
+    """
+    cached = plan_cache.get(kind, inputs)
+    if cached is not None:
+        on_complete(cached)
+        return sse_response([sse_event(cached), sse_event('', event='done')])
+    
+    try:
+        generation_limiter.acquire(time.monotonic() + GENERATION_TIMEOUT)
+    except GenerationRejected as e:
+        return sse_response([sse_event(str(e), event='error')])
+    
+    try:
+        response = get_model('gemini-pro').generate_content(prompt, stream=True)
+    except Exception as e:
+        generation_limiter.release()
+        print(f"Error starting streamed generation: {str(e)}")
+        return sse_response([sse_event('Could not generate a plan at this time. Please try again later.', event='error')])
+    
+    def complete(text):
+        plan_cache.set(kind, inputs, text)
+        on_complete(text)
+    
+    def close():
+        # Runs on completion and on client disconnect alike
+        close_stream(response)
+        generation_limiter.release()
+    
+    return sse_response(stream_chunks(response, complete), on_close=close)
+
+@route('/stream/plan')
+def stream_plan():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    user_id = session['user_id']
+    user_data = get_uow().get('user_details', user_id)
+    if user_data is None:
+        return redirect(url_for('edit_profile'))
+    
+    def save(text):
+        get_storage().write_docs([('user_details', user_id, 'update', {
+            'plan': text,
+            'plan_status': 'ready'
+        })])
+        profile_cache.invalidate(user_id)
+    
+    return stream_generation('workout', workout_plan_inputs(user_data),
+                             workout_plan_prompt(user_data), save)
+
+@route('/stream/meal_plan')
+def stream_meal_plan():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    user_id = session['user_id']
+    user_data = get_uow().get('user_details', user_id)
+    if user_data is None:
+        return redirect(url_for('edit_profile'))
+    diet_pref = user_data.get('diet_preference', 'veg')
+    allergies = user_data.get('allergies', '')
+    
+    def save(text):
+        get_storage().write_docs([('user_details', user_id, 'update', {
+            'meal_plan': text
+        })])
+        profile_cache.invalidate(user_id)
+    
+    return stream_generation('meal', meal_plan_inputs(user_data, diet_pref, allergies),
+                             meal_plan_prompt(user_data, diet_pref, allergies), save)
+
+@route('/download_meal_plan')
+def download_meal_plan():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    
+    user_data = get_uow().get('user_details', session['user_id'])
+    if user_data is None:
+        return "No meal plan found", 404
+    
+    meal_plan = user_data.get('meal_plan')
+    
+    if not meal_plan:
+        return "No meal plan available", 404
+    
+    # Generate PDF
+    return send_cached_pdf('meal', meal_plan, user_data, 'FitTracker_Meal_Plan.pdf')
+
+@click.command('backfill-rollups')
+def backfill_rollups():
+    """Builds progress rollups for every existing user."""
+    if STORAGE_BACKEND != 'firestore':
+        print("Rollups are only kept by the Firestore backend")
+        return
+    from rollups import rebuild_rollups
+    storage = get_storage()
+    for user_id in storage.user_ids():
+        rollup = rebuild_rollups(storage.db, user_id)
+        print(f"Rebuilt rollups for {user_id}: {rollup['count']} entries")
+
+@click.command('backfill-usernames')
+def backfill_usernames():
+    """Creates usernames/{username} index documents for existing users."""
+    if STORAGE_BACKEND != 'firestore':
+        print("The username index is only kept by the Firestore backend")
+        return
+    from accounts import backfill_username_index
+    created, conflicts = backfill_username_index(get_storage().db)
+    print(f"Created {created} username index documents")
+    for username in conflicts:
+        print(f"Could not index username {username!r}: duplicate or invalid")
+
+@click.command('import-progress')
+@click.argument('user_id')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'json']), help='Defaults to the file extension.')
+def import_progress_file(user_id, path, file_format):
+    """Imports progress entries for a user from a CSV or JSON file."""
+    storage = get_storage()
+    if storage.get_doc('users', user_id) is None:
+        print(f"No user with id {user_id}")
+        return
+    report = None
+    try:
+        with open(path, 'rb') as f:
+            for report in import_rows(storage, user_id, read_rows(f, file_format or import_format(path))):
+                print(f"{report['rows']} rows read, {report['imported']} imported")
+    except (ValueError, csv.Error) as e:
+        print(f"Could not read {path}: {e}")
+    finally:
+        analytics_cache.invalidate(user_id)
+    if report is not None:
+        print(f"{report['duplicates']} duplicates and {report['invalid']} invalid rows skipped")
+        for error in report['errors']:
+            print(f"  {error}")
+
+@click.command('delete-user')
+@click.argument('user_id')
+@click.confirmation_option(prompt='Delete this user with their profile and progress?')
+def delete_user(user_id):
+    """Deletes a user and everything they own; safe to run again if interrupted."""
+    if get_storage().delete_user(user_id):
+        print(f"Deleted user {user_id}")
+    else:
+        print(f"No user with id {user_id}; removed any data left behind")
+    profile_cache.invalidate(user_id)
+    analytics_cache.invalidate(user_id)
+
+def create_app():
+    """Builds the Flask app. Storage, Gemini and ReportLab load on first use."""
+    if not os.getenv('GOOGLE_API_KEY') and not use_fake_model():
+        raise Exception("GOOGLE_API_KEY not found in environment variables")
+    
+    app = Flask(__name__)
+    app.secret_key = 'your_secret_key'  # Change this to a secure secret key
+    for rule, view_func, options in routes:
+        app.add_url_rule(rule, view_func=view_func, **options)
+    app.after_request(commit_uow)
+    app.cli.add_command(backfill_rollups)
+    app.cli.add_command(backfill_usernames)
+    app.cli.add_command(import_progress_file)
+    app.cli.add_command(delete_user)
+    return app
+
+app = create_app()
+
+if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""ASGI entry point: async versions of the hot routes, the Flask app for the rest.
+
+    uvicorn asgi:application --workers 2
+
+/profile, /analyze, /progress and /meal_suggester are served by an async
+Quart app, so a worker keeps serving other requests while it waits on
+Firestore. Independent reads within a request run concurrently. Every
+other path goes to the Flask app in app.py, run in a thread pool. Both
+apps share the secret key, so the session cookie works across them.
+"""
+import asyncio
+import os
+from datetime import datetime
+from hypercorn.middleware import AsyncioWSGIMiddleware
+from quart import Quart, render_template, request, redirect, url_for, session
+from async_storage import open_async_storage
+from charts import parse_range
+import app as wsgi
+
+ASYNC_PATHS = {'/profile', '/analyze', '/progress', '/meal_suggester'}
+
+quart_app = Quart(__name__)
+quart_app.secret_key = wsgi.app.secret_key
+
+# Links in templates may point at any Flask view, so every endpoint must build
+for rule in wsgi.app.url_map.iter_rules():
+    if rule.rule not in ASYNC_PATHS and rule.endpoint != 'static':
+        quart_app.add_url_rule(rule.rule, endpoint=rule.endpoint, methods=rule.methods)
+
+_async_storage = None
+
+def get_async_storage():
+    """Returns the async storage facade, opening it inside the running event loop."""
+    global _async_storage
+    if _async_storage is None:
+        _async_storage = open_async_storage(wsgi.STORAGE_BACKEND, wsgi.get_storage())
+    return _async_storage
+
+async def get_user_details(user_id):
+    """Reads user_details through the shared profile cache."""
+    hit, data = wsgi.profile_cache.lookup(user_id)
+    if not hit:
+        generation = wsgi.profile_cache.generation(user_id)
+        data = await get_async_storage().get_doc('user_details', user_id)
+        wsgi.profile_cache.put(user_id, data, generation)
+    return dict(data) if data is not None else None
+
+async def update_user_details(user_id, fields):
+    await get_async_storage().write_docs([('user_details', user_id, 'update', fields)])
+    wsgi.profile_cache.invalidate(user_id)
+
+@quart_app.route('/profile')
+async def profile():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+
+    user_id = session['user_id']
+    user_data, recent = await asyncio.gather(
+        get_user_details(user_id),
+        get_async_storage().recent_progress(user_id, 5)
+    )
+
+    return await render_template('profile.html', user_data=user_data or {},
+                                 progress=wsgi.recent_progress_list(recent))
+
+@quart_app.route('/progress', methods=['GET', 'POST'])
+async def progress():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+
+    if request.method == 'POST':
+        form = await request.form
+        await get_async_storage().add_progress(wsgi.progress_form_entry(session['user_id'], form))
+        wsgi.analytics_cache.invalidate(session['user_id'])
+        return redirect(url_for('analyze'))
+
+    return await render_template('progress.html', current_date=datetime.now())
+
+@quart_app.route('/analyze')
+async def analyze():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+
+    user_id = session['user_id']
+    start, end = parse_range(request.args)
+    storage = get_async_storage()
+    entries, rollup, user_data = await asyncio.gather(
+        storage.progress_range(user_id, start, end, wsgi.CHART_FIELDS),
+        storage.progress_summary(user_id),
+        get_user_details(user_id)
+    )
+    # The cached analytics are checked against the rollup; a whole-history
+    # load and the pandas work run off the event loop
+    analytics = await asyncio.to_thread(wsgi.user_analytics, user_id, rollup)
+
+    context = wsgi.analyze_context(entries, rollup, start, end, analytics, (user_data or {}).get('goal_weight'))
+    return await render_template('analyze.html', **context)
+
+@quart_app.route('/meal_suggester', methods=['GET', 'POST'])
+async def meal_suggester():
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+
+    user_id = session['user_id']
+    user_data = await get_user_details(user_id)
+    if user_data is None:
+        return redirect(url_for('edit_profile'))
+
+    if request.method == 'POST':
+        form = await request.form
+        diet_pref = form.get('diet_preference', 'veg')
+        allergies = form.get('allergies', '')
+        preferences = {
+            'diet_preference': diet_pref,
+            'allergies': allergies,
+            'updated_at': wsgi.SERVER_TIMESTAMP
+        }
+
+        if form.get('stream'):
+            # The page streams the meal plan from /stream/meal_plan
+            await update_user_details(user_id, preferences)
+            return redirect(url_for('meal_suggester', stream=1))
+
+        try:
+            # Generation keeps the plan cache, single-flight and limiter, which are thread-based
+            meal_plan_text = await asyncio.to_thread(wsgi.generate_meal_plan, user_data, diet_pref, allergies)
+        except Exception as e:
+            print(f"Error generating meal plan: {str(e)}")
+            await update_user_details(user_id, preferences)
+            return redirect(url_for('meal_suggester', error='generation_failed'))
+
+        # Preferences and the plan go out in one write
+        await update_user_details(user_id, {**preferences, 'meal_plan': meal_plan_text})
+        return redirect(url_for('meal_suggester'))
+
+    return await render_template('meal_suggester.html', user_data=user_data,
+                                 stream=request.args.get('stream') == '1')
+
+@quart_app.after_serving
+async def shutdown():
+    wsgi.shutdown_clients()
+
+# Flask views run in the middleware's thread pool
+flask_asgi = AsyncioWSGIMiddleware(wsgi.app, max_body_size=int(os.getenv('MAX_BODY_SIZE', 16 * 1024 * 1024)))
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] not in ASYNC_PATHS:
+        await flask_asgi(scope, receive, send)
+    else:
+        await quart_app(scope, receive, send)
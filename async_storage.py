@@ -0,0 +1,98 @@
+"""Async facades over the storage backends, for the ASGI routes in asgi.py.
+
+They offer the same methods as storage.py, as coroutines.
+"""
+import asyncio
+
+
+class ThreadedStorage:
+    """Async facade over a sync backend; every call runs in a worker thread."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def __getattr__(self, name):
+        method = getattr(self.storage, name)
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return call
+
+
+class AsyncFirestoreStorage:
+    """Reads and plain writes on firestore.AsyncClient, so they never block the event loop.
+
+    Progress writes and rollup rebuilds are multi-document transactions
+    implemented on the sync client; those run in a worker thread through
+    the sync storage.
+    """
+
+    def __init__(self, client, storage):
+        self.client = client
+        self.storage = storage
+
+    async def get_doc(self, collection, doc_id):
+        doc = await self.client.collection(collection).document(doc_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    async def write_docs(self, writes):
+        from firestore_storage import to_firestore
+        batch = self.client.batch()
+        for collection, doc_id, op, data in writes:
+            ref = self.client.collection(collection).document(doc_id)
+            if op == 'set':
+                batch.set(ref, to_firestore(data))
+            else:
+                batch.update(ref, to_firestore(data))
+        await batch.commit()
+
+    async def add_progress(self, data):
+        return await asyncio.to_thread(self.storage.add_progress, data)
+
+    async def delete_progress(self, user_id, entry_id):
+        return await asyncio.to_thread(self.storage.delete_progress, user_id, entry_id)
+
+    async def recent_progress(self, user_id, limit):
+        from google.cloud import firestore
+        query = (self.client.collection('progress')
+                 .where('user_id', '==', user_id)
+                 .order_by('date', direction=firestore.Query.DESCENDING)
+                 .limit(limit))
+        return [{'id': doc.id, **doc.to_dict()} async for doc in query.stream()]
+
+    async def progress_range(self, user_id, start, end, fields=None):
+        from firestore_storage import PROGRESS_FIELDS
+        query = (self.client.collection('progress')
+                 .where('user_id', '==', user_id)
+                 .where('date', '>=', start).where('date', '<=', end)
+                 .order_by('date')
+                 .select(fields or PROGRESS_FIELDS))
+        return [{'id': doc.id, **doc.to_dict()} async for doc in query.stream()]
+
+    async def progress_page(self, user_id, limit, order='date', after=None, after_id=None):
+        from firestore_storage import progress_page_query
+        query = progress_page_query(self.client, user_id, limit, order, after, after_id)
+        return [{'id': doc.id, **doc.to_dict()} async for doc in query.stream()]
+
+    async def progress_summary(self, user_id):
+        from rollups import ROLLUPS
+        doc = await self.client.collection(ROLLUPS).document(user_id).get()
+        if doc.exists:
+            return doc.to_dict()
+        # First use builds the rollups from the history
+        return await asyncio.to_thread(self.storage.progress_summary, user_id)
+
+
+def new_async_firestore_client():
+    """Opens an AsyncClient for the default Firebase app; call it inside the event loop."""
+    import firebase_admin
+    from google.cloud import firestore
+    app = firebase_admin.get_app()
+    return firestore.AsyncClient(project=app.project_id, credentials=app.credential.get_credential())
+
+
+def open_async_storage(backend, storage):
+    """Wraps an open sync backend: Firestore goes native async, anything else uses threads."""
+    if backend == 'firestore':
+        return AsyncFirestoreStorage(new_async_firestore_client(), storage)
+    return ThreadedStorage(storage)
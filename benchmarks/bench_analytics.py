@@ -0,0 +1,84 @@
+"""Benchmark for the trend analytics behind the analyze page.
+
+Builds ten years of daily progress entries (as storage.iter_progress()
+returns them) for one user and times, separately:
+
+  import   loading numpy and pandas, paid once per process
+  load     reading the entries into a ProgressSeries
+  compute  resampling to days, EWMA trend, rolling averages, TDEE
+  summary  the figures and goal projection for one request
+  cached   a hit in the per-user analytics cache
+
+Each step is the best of several runs.
+
+    python benchmarks/bench_analytics.py [days]
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from analytics import ProgressAnalytics
+from profile_cache import ProfileCache
+from progress_series import ProgressSeries
+
+RUNS = 20
+
+
+def history(days):
+    rng = random.Random(42)
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=days)
+    weight = 95.0
+    entries = []
+    for day in range(days):
+        weight += rng.gauss(-0.01, 0.3) * 0.3
+        entries.append({
+            'date': start + timedelta(days=day, hours=rng.uniform(6, 22)),
+            'weight': round(weight + rng.gauss(0, 0.4), 1),
+            'calories_eaten': rng.randint(1600, 2800),
+            'workout_completed': rng.choice(['yes', 'yes', 'no'])
+        })
+    return entries
+
+
+def best(func, *args):
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 3650
+    entries = history(days)
+    print(f"{days} daily entries")
+
+    start = time.perf_counter()
+    import numpy
+    import pandas
+    print(f"{'import':8} {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    elapsed, series = best(ProgressSeries.from_entries, entries)
+    print(f"{'load':8} {elapsed:8.2f} ms")
+    elapsed, analytics = best(ProgressAnalytics, series)
+    print(f"{'compute':8} {elapsed:8.2f} ms")
+    elapsed, summary = best(analytics.summary, analytics.figures['trend_weight'] - 5)
+    print(f"{'summary':8} {elapsed:8.3f} ms")
+
+    cache = ProfileCache()
+    cache.put('user', analytics, cache.generation('user'), size=analytics.nbytes)
+    elapsed, _ = best(cache.lookup, 'user')
+    print(f"{'cached':8} {elapsed:8.4f} ms  {analytics.nbytes / 1024:.0f} KB per user")
+
+    for key, value in summary.items():
+        print(f"  {key:16} {value:.2f}" if isinstance(value, float) else f"  {key:16} {value}")
+
+
+if __name__ == '__main__':
+    main()
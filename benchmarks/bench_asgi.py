@@ -0,0 +1,128 @@
+"""Throughput benchmark for the async /analyze route against the Flask one.
+
+Storage is replaced by a fake that sleeps for a fixed round-trip time on
+each read, as Firestore would. The Flask view runs in a pool of threads,
+like a gthread worker; the async view runs on one event loop with the
+same number of requests in flight. /analyze makes two independent reads
+(the chart range and the rollup), which the async view issues
+concurrently. The profile and the trend analytics are read once and then
+served from their caches, as neither changes between requests.
+
+    python benchmarks/bench_asgi.py [rtt_ms] [requests]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('FAKE_LLM', '1')
+os.environ.setdefault('PDF_RENDER_WORKERS', '0')
+
+import app as wsgi
+import asgi
+
+ENTRIES = [{'id': str(day), 'date': datetime(2024, 1, 1) + timedelta(days=day),
+            'weight': 80.0 - day * 0.05, 'calories_eaten': 2200} for day in range(90)]
+SUMMARY = {'count': 90, 'weight_sum': sum(entry['weight'] for entry in ENTRIES), 'calories_sum': 2200 * 90,
+           'workouts_completed': 0, 'weight_min': 75.55, 'weight_max': 80.0,
+           'first_date': ENTRIES[0]['date'], 'first_weight': 80.0,
+           'last_date': ENTRIES[-1]['date'], 'last_weight': 75.55}
+PROFILE = {'goal_weight': 72.0}
+
+
+class LatencyStorage:
+    """The reads /analyze makes, each costing one round trip."""
+
+    def __init__(self, rtt):
+        self.rtt = rtt
+
+    def progress_range(self, user_id, start, end, fields=None):
+        time.sleep(self.rtt)
+        return ENTRIES
+
+    def progress_summary(self, user_id):
+        time.sleep(self.rtt)
+        return SUMMARY
+
+    def iter_progress(self, user_id, fields=None):
+        time.sleep(self.rtt)
+        return iter(ENTRIES)
+
+    def get_doc(self, collection, doc_id):
+        time.sleep(self.rtt)
+        return dict(PROFILE)
+
+
+class AsyncLatencyStorage(LatencyStorage):
+
+    async def progress_range(self, user_id, start, end, fields=None):
+        await asyncio.sleep(self.rtt)
+        return ENTRIES
+
+    async def progress_summary(self, user_id):
+        await asyncio.sleep(self.rtt)
+        return SUMMARY
+
+    async def get_doc(self, collection, doc_id):
+        await asyncio.sleep(self.rtt)
+        return dict(PROFILE)
+
+
+def bench_wsgi(threads, requests):
+    local = threading.local()
+
+    def get(_):
+        if not hasattr(local, 'client'):
+            local.client = wsgi.app.test_client()
+            with local.client.session_transaction() as session:
+                session['user_id'] = 'bench'
+        assert local.client.get('/analyze').status_code == 200
+
+    with ThreadPoolExecutor(threads) as pool:
+        start = time.perf_counter()
+        list(pool.map(get, range(requests)))
+        return requests / (time.perf_counter() - start)
+
+
+async def bench_asgi(concurrency, requests):
+    client = asgi.quart_app.test_client()
+    async with client.session_transaction() as session:
+        session['user_id'] = 'bench'
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            assert (await client.get('/analyze')).status_code == 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    rtt = (float(sys.argv[1]) if len(sys.argv) > 1 else 20) / 1000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+
+    wsgi._storage = LatencyStorage(rtt)
+    asgi._async_storage = AsyncLatencyStorage(rtt)
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'analyze.html'), 'w') as f:
+            f.write('{{ stats }} {{ weights|length }}')
+        wsgi.app.template_folder = tmp
+        asgi.quart_app.template_folder = tmp
+
+        print(f"/analyze, {rtt * 1000:.0f} ms per storage read, {requests} requests")
+        print(f"{'in flight':>10}  {'flask req/s':>12}  {'async req/s':>12}")
+        for concurrency in (4, 16, 64):
+            threaded = bench_wsgi(concurrency, requests)
+            evented = asyncio.run(bench_asgi(concurrency, requests))
+            print(f"{concurrency:>10}  {threaded:12.0f}  {evented:12.0f}")
+
+
+if __name__ == '__main__':
+    main()
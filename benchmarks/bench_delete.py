@@ -0,0 +1,74 @@
+"""Benchmark for bulk and range deletion of progress on the Firestore backend.
+
+Seeds a history of daily entries in the in-memory store from
+fake_firestore.py, which charges a round trip per RPC, then deletes it:
+
+  per entry   get() then delete() for each entry, as /delete_progress/<id> did
+              (its rollup reads are not counted)
+  by ids      delete_progress_many() with the list of ids
+  by range    delete_progress_many() with a date range covering the history
+  account     delete_user(), which also removes the rollups and account documents
+
+The bulk paths rebuild or remove the rollups once at the end; that time
+is included.
+
+    python benchmarks/bench_delete.py [entries]
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from clients import ClientPool
+from firestore_storage import FirestoreStorage
+from fake_firestore import RTT, Store
+
+START = datetime(2015, 1, 1, tzinfo=timezone.utc)
+
+
+def seed(entries):
+    db = Store()
+    db.docs['users/user'] = {'username': 'bench', 'password': 'pw'}
+    db.docs['usernames/bench'] = {'user_id': 'user', 'password': 'pw'}
+    db.docs['user_details/user'] = {'name': 'Bench'}
+    for day in range(entries):
+        db.docs[f"progress/{day:08d}"] = {'user_id': 'user', 'date': START + timedelta(days=day),
+                                          'weight': 80.0, 'calories_eaten': 2000, 'workout_completed': 'yes'}
+    return db
+
+
+def per_entry(storage, db, ids):
+    for entry_id in ids:
+        ref = db.collection('progress').document(entry_id)
+        if ref.get().exists:
+            batch = db.batch()
+            batch.delete(ref)
+            batch.commit()
+
+
+def run(label, entries, delete):
+    db = seed(entries)
+    storage = FirestoreStorage(ClientPool(lambda: db))
+    ids = [path.split('/')[1] for path in db.docs if path.startswith('progress/')]
+    db.rpcs = 0
+    start = time.perf_counter()
+    delete(storage, db, ids)
+    elapsed = time.perf_counter() - start
+    left = sum(1 for path in db.docs if path.startswith('progress/'))
+    print(f"{label:10} {elapsed:7.2f} s  {db.rpcs:5} rpcs  {left} entries left")
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{entries} entries, {RTT * 1000:.0f} ms per RPC")
+    run('per entry', entries, per_entry)
+    run('by ids', entries, lambda storage, db, ids: storage.delete_progress_many('user', entry_ids=ids))
+    run('by range', entries, lambda storage, db, ids: storage.delete_progress_many(
+        'user', start=START, end=START + timedelta(days=entries)))
+    run('account', entries, lambda storage, db, ids: storage.delete_user('user'))
+
+
+if __name__ == '__main__':
+    main()
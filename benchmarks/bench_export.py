@@ -0,0 +1,98 @@
+"""Benchmark for the streaming progress export.
+
+Seeds a temporary SQLite database with a synthetic history for one user
+(1M entries by default), then exports it three ways:
+
+  naive    load every entry with progress_range(), then write the CSV
+  csv      iter_progress_csv() over storage.iter_progress()
+  parquet  iter_progress_parquet() over storage.iter_progress()
+
+Each is timed, then run again under tracemalloc for its peak Python
+memory. pyarrow allocates outside the Python heap, so the Parquet line
+also reports the peak of pyarrow's memory pool.
+
+    python benchmarks/bench_export.py [rows]
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sqlite_storage import SqliteStorage, new_id, to_epoch
+from progress_export import EXPORT_FIELDS, iter_progress_csv, iter_progress_parquet
+
+
+def seed(storage, rows):
+    user_id = storage.create_user('bench', 'pw')
+    start = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    rng = random.Random(42)
+
+    def entries():
+        weight = 90.0
+        for i in range(rows):
+            weight += rng.uniform(-0.3, 0.3)
+            date = to_epoch(start + timedelta(minutes=30 * i))
+            yield (new_id(), user_id, date, round(weight, 2), rng.randint(1500, 3000),
+                   rng.choice(['yes', 'no']), date)
+
+    with storage._transaction() as conn:
+        conn.executemany('INSERT INTO progress VALUES (?, ?, ?, ?, ?, ?, ?)', entries())
+    return user_id
+
+
+def naive(storage, user_id):
+    entries = storage.progress_range(user_id, datetime(1970, 1, 1, tzinfo=timezone.utc),
+                                     datetime(2100, 1, 1, tzinfo=timezone.utc))
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(EXPORT_FIELDS)
+    for entry in entries:
+        writer.writerow([entry['date'].isoformat(), entry['weight'], entry['calories_eaten'],
+                         entry['workout_completed']])
+    return len(output.getvalue().encode('utf-8'))
+
+
+def streamed_csv(storage, user_id):
+    return sum(len(chunk) for chunk in iter_progress_csv(storage.iter_progress(user_id, EXPORT_FIELDS)))
+
+
+def streamed_parquet(storage, user_id):
+    chunks = iter_progress_parquet(storage.iter_progress(user_id, EXPORT_FIELDS))
+    return sum(len(chunk) for chunk in chunks)
+
+
+def measure(func, storage, user_id):
+    start = time.perf_counter()
+    size = func(storage, user_id)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(storage, user_id)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, size, peak
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SqliteStorage(os.path.join(tmp, 'bench.db'))
+        user_id = seed(storage, rows)
+        print(f"{rows} entries")
+        for label, func in (('naive', naive), ('csv', streamed_csv), ('parquet', streamed_parquet)):
+            elapsed, size, peak = measure(func, storage, user_id)
+            print(f"{label:8} {elapsed:6.2f} s  {rows / elapsed / 1000:6.0f}k rows/s  "
+                  f"{size / 2 ** 20:6.1f} MB out  peak {peak / 2 ** 20:7.1f} MB")
+        import pyarrow as pa
+        print(f"pyarrow memory pool peak {pa.default_memory_pool().max_memory() / 2 ** 20:.1f} MB")
+        storage.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark for bulk progress import on the Firestore backend.
+
+Imports a CSV of daily entries through progress_import and
+FirestoreStorage.import_progress, against an in-memory store that charges
+a fixed round trip per RPC plus a small cost per document written. Compares
+one write per row, as entering the rows through the /progress form would
+do (without counting its rollup reads), with batches of 500 committed one
+at a time and in parallel. The rollups are rebuilt once at the end of each
+batched import and that time is included.
+
+    python benchmarks/bench_import.py [rows]
+"""
+import io
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from clients import ClientPool
+from firestore_storage import FirestoreStorage, to_firestore
+from progress_import import import_rows, iter_csv_rows
+from fake_firestore import RTT, Store
+
+
+def csv_file(rows):
+    lines = ['date,weight,calories_eaten,workout_completed']
+    start = date(2024, 1, 1) - timedelta(days=rows)
+    for day in range(rows):
+        lines.append(f"{start + timedelta(days=day)},{90 - day * 0.01:.2f},{2000 + day % 500},{'yes' if day % 3 else 'no'}")
+    return io.BytesIO('\n'.join(lines).encode())
+
+
+def per_row(db, user_id, rows):
+    for row in iter_csv_rows(csv_file(rows)):
+        entry = {'user_id': user_id, **row}
+        batch = db.batch()
+        batch.set(db.collection('progress').document(), to_firestore(entry))
+        batch.commit()
+
+
+def batched(db, user_id, rows, workers):
+    storage = FirestoreStorage(ClientPool(lambda: db), write_workers=workers)
+    for report in import_rows(storage, user_id, iter_csv_rows(csv_file(rows))):
+        pass
+    assert report['imported'] == rows
+
+
+def run(label, func, *args):
+    db = Store()
+    start = time.perf_counter()
+    func(db, 'user', *args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:22} {elapsed:7.2f} s  {db.rpcs:5} rpcs")
+    return elapsed
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print(f"{rows} rows, {RTT * 1000:.0f} ms per RPC")
+    base = run('one write per row', per_row, rows)
+    for workers in (1, 4):
+        elapsed = run(f"batches of 500 x{workers}", batched, rows, workers)
+        print(f"{'':22} {base / elapsed:7.1f}x faster")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Microbenchmark for the PDF text layout engine.
+
+Compares the previous wrap loop (stringWidth per line, simpleSplit per long
+line) and character-by-character title truncation with TextMetrics, on a
+plan long enough to fill about 50 pages.
+
+    python benchmarks/bench_pdf_layout.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from pdf import FitTrackerPDF, TextMetrics, create_fitness_plan_pdf
+
+
+def synthetic_plan(days=123):
+    lines = []
+    for day in range(days):
+        lines.append(f"**Day {day + 1}: Upper Body Strength and Conditioning**")
+        lines.append("* Bench Press: 4 sets of 8-10 reps at a challenging but controlled weight, resting 90 seconds between sets")
+        lines.append("* Rows: 4x10")
+        lines.append("* Overhead Press: 3 sets of 8 reps, keep the core braced and avoid arching the lower back throughout")
+        lines.append("Focus on progressive overload week over week while keeping technique strict and recovery adequate for the next session.")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def legacy_layout(text, available_width):
+    lines = [line.replace('*', '•') for line in text.split('\n')]
+    text_lines = []
+    for line in lines:
+        if stringWidth(line, "Helvetica", 14) > available_width:
+            text_lines.extend(simpleSplit(line, "Helvetica", 14, available_width))
+        else:
+            text_lines.append(line)
+    for line in text_lines:
+        line = line.strip()
+        if ':' in line:
+            key = line.split(':', 1)[0]
+            stringWidth(key + ':  ', "Helvetica-Bold", 14)
+    return text_lines
+
+
+def legacy_truncate(title, max_width):
+    text = title
+    while stringWidth(text, "Helvetica-Bold", 22) > max_width:
+        title = title[:-1]
+        text = f"{title}..."
+    return text
+
+
+def best_of(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    plan = synthetic_plan()
+    pdf = FitTrackerPDF()
+    available_width = pdf.content_width - 72 * 0.8
+    title = "A Very Long Section Title " * 20
+
+    old = best_of(lambda: legacy_layout(plan, available_width))
+    new = best_of(lambda: FitTrackerPDF().layout_text(plan))
+    pages = len(pdf.layout_text(plan)) // 22
+    print(f"layout  ({pages} pages): legacy {old * 1000:8.2f} ms   engine {new * 1000:8.2f} ms   {old / new:5.1f}x")
+
+    metrics = TextMetrics()
+    old = best_of(lambda: legacy_truncate(title, 400))
+    new = best_of(lambda: metrics.truncate(title, "Helvetica-Bold", 22, 400))
+    print(f"title truncation:      legacy {old * 1000:8.2f} ms   engine {new * 1000:8.2f} ms   {old / new:5.1f}x")
+
+    render = best_of(lambda: create_fitness_plan_pdf({}, plan), repeat=3)
+    print(f"full render:           {render * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
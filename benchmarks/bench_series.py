@@ -0,0 +1,91 @@
+"""Memory benchmark for ProgressSeries against the Python lists it replaces.
+
+Streams a synthetic daily history (10 years by default) and keeps it in
+memory three ways, measuring what stays allocated with tracemalloc:
+
+  dicts    a to_dict() copy of every entry, as the original analyze() kept
+  lists    parallel lists of datetimes, timestamps, weights, calories and
+           workout strings, as the chart and stats code built them
+  series   ProgressSeries.from_entries()
+
+It then checks that a one-year slice and its numpy columns share the
+series' buffers rather than copying them.
+
+    python benchmarks/bench_series.py [days]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from progress_series import ProgressSeries
+
+
+def entries(days):
+    """Fresh entry dicts, as a storage query yields them."""
+    rng = random.Random(42)
+    start = datetime(2015, 1, 1, 7, tzinfo=timezone.utc)
+    for day in range(days):
+        yield {
+            'date': start + timedelta(days=day, minutes=rng.randint(0, 600)),
+            'weight': round(rng.uniform(60, 100), 1),
+            'calories_eaten': rng.randint(1500, 3000),
+            'workout_completed': rng.choice(['yes', 'no'])
+        }
+
+
+def dicts(source):
+    return [dict(entry) for entry in source]
+
+
+def lists(source):
+    dates, timestamps, weights, calories, workouts = [], [], [], [], []
+    for entry in source:
+        dates.append(entry['date'])
+        timestamps.append(entry['date'].timestamp())
+        weights.append(entry['weight'])
+        calories.append(entry['calories_eaten'])
+        workouts.append(entry['workout_completed'])
+    return dates, timestamps, weights, calories, workouts
+
+
+def series(source):
+    return ProgressSeries.from_entries(source)
+
+
+def measure(build, days):
+    start = time.perf_counter()
+    build(entries(days))
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    kept = build(entries(days))
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return elapsed, size
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 3650
+    print(f"{days} entries")
+    base = None
+    for label, build in (('dicts', dicts), ('lists', lists), ('series', series)):
+        elapsed, size = measure(build, days)
+        base = base or size
+        print(f"{label:8} {size / 2 ** 10:8.0f} KB  {size / days:6.1f} bytes/entry  "
+              f"{base / size:5.1f}x smaller  built in {elapsed * 1000:6.1f} ms")
+
+    import numpy as np
+    history = series(entries(days))
+    year = history.between(datetime(2020, 1, 1), datetime(2020, 12, 31))
+    print(f"2020 slice: {len(year)} entries, weights share memory: "
+          f"{np.shares_memory(year.weights(), history.weights())}, "
+          f"days share memory: {np.shares_memory(year.days(), history.days())}")
+
+
+if __name__ == '__main__':
+    main()
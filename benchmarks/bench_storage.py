@@ -0,0 +1,76 @@
+"""Benchmark for the SQLite storage backend.
+
+Seeds a temporary database with ten years of daily progress for a number
+of users, then times the queries the progress pages run: the latest five
+entries, a 90-day chart range and the summary totals. Each is run with
+the (user_id, date) index and again after dropping it.
+
+    python benchmarks/bench_storage.py [users]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sqlite_storage import SqliteStorage, new_id, to_epoch
+
+
+def seed(storage, users, days=3650):
+    start = datetime(2015, 1, 1, tzinfo=timezone.utc)
+    rng = random.Random(42)
+    user_ids = [storage.create_user(f"user{i}", 'pw') for i in range(users)]
+    with storage._transaction() as conn:
+        for user_id in user_ids:
+            rows = []
+            weight = 90.0
+            for day in range(days):
+                weight += rng.uniform(-0.3, 0.25)
+                date = to_epoch(start + timedelta(days=day))
+                rows.append((new_id(), user_id, date, weight, rng.randint(1500, 3000),
+                             rng.choice(['yes', 'no']), date))
+            conn.executemany('INSERT INTO progress VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    return user_ids, start + timedelta(days=days)
+
+
+def per_call(func, user_ids, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for user_id in user_ids:
+            func(user_id)
+        best = min(best, (time.perf_counter() - start) / len(user_ids))
+    return best
+
+
+def run(storage, user_ids, end):
+    start = end - timedelta(days=90)
+    return {
+        'recent 5': per_call(lambda user_id: storage.recent_progress(user_id, 5), user_ids),
+        'range 90 days': per_call(lambda user_id: storage.progress_range(user_id, start, end), user_ids),
+        'summary': per_call(storage.progress_summary, user_ids),
+    }
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SqliteStorage(os.path.join(tmp, 'bench.db'))
+        user_ids, end = seed(storage, users)
+        print(f"{users} users x 3650 entries, journal_mode="
+              f"{storage._conn().execute('PRAGMA journal_mode').fetchone()[0]}")
+
+        indexed = run(storage, user_ids, end)
+        storage._conn().execute('DROP INDEX progress_user_date')
+        scanned = run(storage, user_ids, end)
+        for name in indexed:
+            print(f"{name:14} indexed {indexed[name] * 1e6:9.1f} us   "
+                  f"no index {scanned[name] * 1e6:9.1f} us   {scanned[name] / indexed[name]:6.1f}x")
+        storage.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark for username lookups on register and login.
+
+Compares the previous query-then-set registration and composite-query login
+with the usernames/{username} index, against the in-memory store in
+fake_firestore.py, which charges a fixed round trip per RPC. Also races
+concurrent registrations of one username to show the duplicate accounts
+the old check-then-write allowed.
+
+    python benchmarks/bench_username_index.py
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from accounts import create_user, authenticate, UsernameTaken
+from fake_firestore import RTT, Store
+
+
+def legacy_register(db, username, password):
+    users_ref = db.collection('users')
+    if list(users_ref.where('username', '==', username).limit(1).stream()):
+        raise UsernameTaken(username)
+    new_user = users_ref.document()
+    new_user.set({'username': username, 'password': password})
+    return new_user.id
+
+
+def legacy_login(db, username, password):
+    query = db.collection('users').where('username', '==', username).where('password', '==', password).limit(1)
+    users = list(query.stream())
+    return users[0].id if users else None
+
+
+def run(label, register, login, users=300):
+    db = Store()
+    start = time.perf_counter()
+    for i in range(users):
+        register(db, f"user{i}", 'pw')
+    register_time = time.perf_counter() - start
+    register_rpcs, db.rpcs, db.scanned = db.rpcs, 0, 0
+
+    start = time.perf_counter()
+    for i in range(users):
+        assert login(db, f"user{i}", 'pw')
+    login_time = time.perf_counter() - start
+    print(f"{label:8} register {register_rpcs / users:.1f} rpc  {register_time / users * 1000:6.2f} ms   "
+          f"login {db.rpcs / users:.1f} rpc  {login_time / users * 1000:6.2f} ms  {db.scanned / users:7.1f} docs scanned")
+
+
+def race(label, register, threads=8):
+    db = Store()
+    barrier = threading.Barrier(threads)
+
+    def attempt():
+        barrier.wait()
+        try:
+            register(db, 'popular', 'pw')
+        except UsernameTaken:
+            pass
+
+    workers = [threading.Thread(target=attempt) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    accounts = sum(1 for path, data in db.docs.items() if path.startswith('users/') and data['username'] == 'popular')
+    print(f"{label:8} {threads} concurrent registrations of one username -> {accounts} account(s)")
+
+
+def main():
+    print(f"{RTT * 1000:.0f} ms per RPC")
+    run('legacy', legacy_register, legacy_login)
+    run('index', create_user, authenticate)
+    race('legacy', legacy_register)
+    race('index', create_user)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Import-time budget check for app.py.
+
+Runs `python -X importtime -c "import app"` in a fresh interpreter and
+exits non-zero when the import takes longer than the budget or loads any
+of the heavy libraries that should only be imported on first use.
+
+    python benchmarks/check_import_time.py [budget_ms]
+
+The budget defaults to IMPORT_BUDGET_MS or 500 ms; the best of three runs
+is compared against it.
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Loaded lazily by the storage, LLM, PDF, chart and export code paths
+DEFERRED = ('firebase_admin', 'google.cloud.firestore', 'grpc', 'google.generativeai',
+            'reportlab', 'numpy', 'pandas', 'plotly', 'pyarrow')
+
+
+def import_profile():
+    """Returns [(cumulative_us, depth, module)] for one cold import of app."""
+    env = {**os.environ, 'FAKE_LLM': '1'}
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode:
+        sys.exit(result.stderr)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative), depth, name.strip()))
+    return rows
+
+
+def main():
+    budget_ms = float(sys.argv[1] if len(sys.argv) > 1 else os.getenv('IMPORT_BUDGET_MS', 500))
+    runs = [import_profile() for _ in range(3)]
+    totals = [next(us for us, _, name in rows if name == 'app') for rows in runs]
+    rows = runs[totals.index(min(totals))]
+    total_ms = min(totals) / 1000
+
+    print(f"import app: {total_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+    direct = sorted((row for row in rows if row[1] == 1), reverse=True)[:8]
+    for us, _, name in direct:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    loaded = {name for _, _, name in rows}
+    for module in DEFERRED:
+        if any(name == module or name.startswith(module + '.') for name in loaded):
+            failures.append(f"{module} is imported at startup")
+    if total_ms > budget_ms:
+        failures.append(f"import took {total_ms:.1f} ms, over the {budget_ms:.0f} ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
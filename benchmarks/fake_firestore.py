@@ -0,0 +1,170 @@
+"""In-memory stand-in for a Firestore client, for the storage benchmarks.
+
+Every RPC costs a fixed round trip, plus a small cost per document a
+batch writes. Queries support the equality, range and document-id 'in'
+filters, limit() and start_after() used by FirestoreStorage; documents
+are returned in insertion order, which the benchmarks keep sorted by date.
+Store.scanned counts the documents queries look at, as a server without
+an index would. create() fails with AlreadyExists, as in accounts.py.
+"""
+import threading
+import time
+import uuid
+from google.api_core.exceptions import AlreadyExists
+
+RTT = 0.005
+WRITE_COST = 0.0002
+
+
+class Store:
+    def __init__(self):
+        self.docs = {}
+        self.rpcs = 0
+        self.scanned = 0
+        self.lock = threading.Lock()
+
+    def rpc(self, writes=0):
+        with self.lock:
+            self.rpcs += 1
+        time.sleep(RTT + writes * WRITE_COST)
+
+    def collection(self, name):
+        return Collection(self, name)
+
+    def batch(self):
+        return Batch(self)
+
+
+class Snapshot:
+    def __init__(self, ref, data):
+        self.reference = ref
+        self.id = ref.id
+        self.exists = data is not None
+        self.data = data
+
+    def to_dict(self):
+        return dict(self.data) if self.data is not None else None
+
+    def get(self, field):
+        return self.data.get(field)
+
+
+class Document:
+    def __init__(self, store, path):
+        self.store = store
+        self.path = path
+        self.id = path.rsplit('/', 1)[-1]
+
+    def collection(self, name):
+        return Collection(self.store, f"{self.path}/{name}")
+
+    def get(self):
+        self.store.rpc()
+        return Snapshot(self, self.store.docs.get(self.path))
+
+    def set(self, data):
+        batch = self.store.batch()
+        batch.set(self, data)
+        batch.commit()
+
+    def create(self, data):
+        batch = self.store.batch()
+        batch.create(self, data)
+        batch.commit()
+
+
+class Query:
+    def __init__(self, store, name, filters=(), limit=None, after=None):
+        self.store = store
+        self.name = name
+        self.filters = filters
+        self.count = limit
+        self.after = after
+
+    def _copy(self, **changes):
+        query = Query(self.store, self.name, self.filters, self.count, self.after)
+        query.__dict__.update(changes)
+        return query
+
+    def where(self, field, op, value):
+        if field == '__name__':
+            value = {ref.id for ref in value}
+        return self._copy(filters=self.filters + ((field, op, value),))
+
+    def order_by(self, *args, **kwargs):
+        return self
+
+    def select(self, fields):
+        return self
+
+    def limit(self, count):
+        return self._copy(count=count)
+
+    def start_after(self, values):
+        return self._copy(after=values['__name__'])
+
+    def _matches(self, doc_id, data):
+        for field, op, value in self.filters:
+            if field == '__name__':
+                if doc_id not in value:
+                    return False
+            elif op == '==' and data.get(field) != value:
+                return False
+            elif op == '>=' and not data.get(field) >= value:
+                return False
+            elif op == '<=' and not data.get(field) <= value:
+                return False
+        return True
+
+    def stream(self):
+        self.store.rpc()
+        prefix = self.name + '/'
+        found = 0
+        skipping = self.after is not None
+        for path, data in list(self.store.docs.items()):
+            if not path.startswith(prefix) or '/' in path[len(prefix):]:
+                continue
+            doc_id = path[len(prefix):]
+            self.store.scanned += 1
+            if skipping:
+                skipping = doc_id != self.after
+                continue
+            if self._matches(doc_id, data):
+                yield Snapshot(Document(self.store, path), data)
+                found += 1
+                if found == self.count:
+                    return
+
+
+class Collection(Query):
+    def document(self, doc_id=None):
+        return Document(self.store, f"{self.name}/{doc_id or uuid.uuid4().hex[:20]}")
+
+
+class Batch:
+    def __init__(self, store):
+        self.store = store
+        self.ops = []
+        self.creates = set()
+
+    def set(self, ref, data):
+        self.ops.append((ref, data))
+
+    def create(self, ref, data):
+        self.ops.append((ref, data))
+        self.creates.add(ref.path)
+
+    def delete(self, ref):
+        self.ops.append((ref, None))
+
+    def commit(self):
+        self.store.rpc(writes=len(self.ops))
+        with self.store.lock:
+            for path in self.creates:
+                if path in self.store.docs:
+                    raise AlreadyExists(path)
+            for ref, data in self.ops:
+                if data is None:
+                    self.store.docs.pop(ref.path, None)
+                else:
+                    self.store.docs[ref.path] = dict(data)
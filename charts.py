@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+DEFAULT_RANGE_DAYS = 90
+
+
+def parse_range(args, default_days=DEFAULT_RANGE_DAYS):
+    """Reads the from/to (YYYY-MM-DD) query args, defaulting to the last default_days."""
+    try:
+        end = datetime.strptime(args['to'], '%Y-%m-%d') if args.get('to') else datetime.now()
+        start = datetime.strptime(args['from'], '%Y-%m-%d') if args.get('from') else end - timedelta(days=default_days)
+    except ValueError:
+        end = datetime.now()
+        start = end - timedelta(days=default_days)
+    # Include the whole of the last day
+    end = end.replace(hour=23, minute=59, second=59, microsecond=999999)
+    start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start, end
+
+
+def lttb_indices(x, y, threshold):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept; every bucket in between
+    keeps the point forming the largest triangle with the previously kept
+    point and the average of the next bucket.
+    """
+    import numpy as np
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) -
+            (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_series(timestamps, series, max_points):
+    """Downsamples several series that share timestamps.
+
+    Each series is reduced with LTTB and the union of the kept indices is
+    returned, so the result holds at most len(series) * max_points points.
+    """
+    # numpy is loaded on the first chart request rather than at startup
+    import numpy as np
+    x = np.asarray(timestamps, dtype=np.float64)
+    if len(x) <= max_points:
+        return np.arange(len(x))
+    keep = [lttb_indices(x, np.asarray(values, dtype=np.float64), max_points) for values in series]
+    return np.unique(np.concatenate(keep))
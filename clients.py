@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+
+
+class ClientPool:
+    """A bounded set of long-lived network clients shared by one process.
+
+    Clients are created on first use and handed out round-robin. The gRPC
+    clients pooled here are thread-safe, so get() does not check a client
+    out exclusively; the pool only bounds how many connections a worker
+    opens and keeps them across requests. A client that has not been
+    checked for check_interval seconds is health-checked before it is
+    returned and replaced when the check fails.
+
+    gRPC channels do not survive fork(). The pool starts over with new
+    clients whenever it finds itself in a different process, and
+    after_fork() does the same explicitly from a server hook.
+    """
+
+    def __init__(self, factory, size=2, check=None, check_interval=60, close=None):
+        self.factory = factory
+        self.size = max(1, size)
+        self.check = check
+        self.check_interval = check_interval
+        self.close_client = close
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.created = 0
+        self.reconnects = 0
+        self.failed_checks = 0
+        # Each slot is [client, last_checked] once connected
+        self.slots = [None] * self.size
+        self.next = 0
+
+    def after_fork(self):
+        """Forgets clients inherited from the parent process without closing them."""
+        self._reset()
+
+    def get(self):
+        if self.pid != os.getpid():
+            self._reset()
+        with self.lock:
+            index = self.next
+            self.next = (index + 1) % self.size
+            slot = self.slots[index]
+            if slot is None:
+                client = self.factory()
+                self.slots[index] = [client, time.monotonic()]
+                self.created += 1
+                return client
+            client = slot[0]
+            due = self.check is not None and time.monotonic() - slot[1] >= self.check_interval
+            if due:
+                # Only one caller runs the check; the others keep using the client
+                slot[1] = time.monotonic()
+        if due and not self._healthy(client):
+            client = self._reconnect(index, client)
+        return client
+
+    def _healthy(self, client):
+        try:
+            return bool(self.check(client))
+        except Exception as e:
+            print(f"Client health check failed: {str(e)}")
+            return False
+
+    def _reconnect(self, index, client):
+        fresh = self.factory()
+        with self.lock:
+            self.failed_checks += 1
+            slot = self.slots[index]
+            if slot is not None and slot[0] is client:
+                self.slots[index] = [fresh, time.monotonic()]
+                self.reconnects += 1
+                stale, current = client, fresh
+            else:
+                stale, current = fresh, slot[0] if slot else fresh
+        if stale is not current:
+            self._close(stale)
+        return current
+
+    def _close(self, client):
+        if self.close_client is None:
+            return
+        try:
+            self.close_client(client)
+        except Exception as e:
+            print(f"Error closing client: {str(e)}")
+
+    def close(self):
+        """Closes every client this process opened."""
+        if self.pid != os.getpid():
+            self._reset()
+            return
+        with self.lock:
+            clients = [slot[0] for slot in self.slots if slot is not None]
+            self.slots = [None] * self.size
+        for client in clients:
+            self._close(client)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'size': self.size,
+                'open': sum(1 for slot in self.slots if slot is not None),
+                'created': self.created,
+                'reconnects': self.reconnects,
+                'failed_checks': self.failed_checks
+            }
@@ -0,0 +1,252 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from itertools import chain
+from firebase_admin import firestore
+from accounts import create_user, authenticate
+from rollups import BATCH_LIMIT, add_progress_entry, delete_progress_entry, get_rollup, rebuild_rollups
+from storage import SERVER_TIMESTAMP, chunked
+
+PROGRESS_FIELDS = ['date', 'weight', 'calories_eaten', 'workout_completed']
+
+# Most values an 'in' filter may list
+IN_LIMIT = 30
+
+
+def progress_page_query(db, user_id, limit, order='date', after=None, after_id=None):
+    """Builds the progress_page query; works on sync and async clients alike.
+
+    Entries are ordered by the document id within equal values, so the
+    (after, after_id) position is stable across pages. Needs composite
+    indexes on progress (user_id, date desc, __name__ desc) and
+    (user_id, created_at, __name__).
+    """
+    direction = firestore.Query.DESCENDING if order == 'date' else firestore.Query.ASCENDING
+    query = (db.collection('progress')
+             .where('user_id', '==', user_id)
+             .order_by(order, direction=direction)
+             .order_by('__name__', direction=direction))
+    if after is not None:
+        position = {order: after} if after_id is None else {order: after, '__name__': after_id}
+        query = query.start_after(position)
+    return query.select(PROGRESS_FIELDS + ['created_at']).limit(limit)
+
+
+def new_firestore_client():
+    """Opens a Firestore client with its own channel, for the default Firebase app."""
+    import firebase_admin
+    from google.cloud import firestore as cloud_firestore
+    app = firebase_admin.get_app()
+    return cloud_firestore.Client(project=app.project_id, credentials=app.credential.get_credential())
+
+
+def firestore_healthy(db):
+    """Health check: a single keyed read that goes over the channel."""
+    db.collection('_health').document('ping').get(timeout=5)
+    return True
+
+
+def to_firestore(data):
+    return {key: firestore.SERVER_TIMESTAMP if value is SERVER_TIMESTAMP else value
+            for key, value in data.items()}
+
+
+class FirestoreStorage:
+    """Storage backed by Cloud Firestore, with progress totals kept in rollups.
+
+    clients is a ClientPool of Firestore clients; each call uses one client
+    from the pool for all of its reads and writes. Imports and bulk deletes
+    are the exception: their batches are spread over the pool and committed
+    by up to write_workers threads at once.
+    """
+
+    def __init__(self, clients, write_workers=4):
+        self.clients = clients
+        self.write_workers = max(1, write_workers)
+
+    @property
+    def db(self):
+        return self.clients.get()
+
+    def create_user(self, username, password):
+        return create_user(self.db, username, password)
+
+    def authenticate(self, username, password):
+        return authenticate(self.db, username, password)
+
+    def user_ids(self):
+        for user in self.db.collection('users').select([]).stream():
+            yield user.id
+
+    def get_doc(self, collection, doc_id):
+        doc = self.db.collection(collection).document(doc_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def write_docs(self, writes):
+        db = self.db
+        batch = db.batch()
+        for collection, doc_id, op, data in writes:
+            ref = db.collection(collection).document(doc_id)
+            if op == 'set':
+                batch.set(ref, to_firestore(data))
+            else:
+                batch.update(ref, to_firestore(data))
+        batch.commit()
+
+    def add_progress(self, data):
+        return add_progress_entry(self.db, to_firestore(data))
+
+    def delete_progress(self, user_id, entry_id):
+        return delete_progress_entry(self.db, user_id, entry_id)
+
+    def import_progress(self, user_id, entries):
+        return self._apply_batches(user_id, self._write_progress, chunked(entries, BATCH_LIMIT))
+
+    def delete_progress_many(self, user_id, entry_ids=None, start=None, end=None):
+        if entry_ids is not None:
+            pages = self._owned_entries(user_id, entry_ids)
+        else:
+            pages = self._progress_pages(user_id, start, end)
+        deleted = 0
+        for deleted in self._apply_batches(user_id, self._delete_docs, pages):
+            pass
+        return deleted
+
+    def delete_user(self, user_id):
+        from accounts import USERNAMES
+        from rollups import ROLLUPS
+        for _ in self._in_parallel(self._delete_docs, self._progress_pages(user_id)):
+            pass
+        db = self.db
+        rollups_ref = db.collection(ROLLUPS).document(user_id)
+        for period in ('weeks', 'months'):
+            docs = (doc.reference for doc in rollups_ref.collection(period).select([]).stream())
+            for _ in self._in_parallel(self._delete_docs, chunked(docs, BATCH_LIMIT)):
+                pass
+        # The account documents go last, so a failed deletion can be run again
+        user = db.collection('users').document(user_id).get()
+        batch = db.batch()
+        if user.exists:
+            batch.delete(db.collection(USERNAMES).document(user.to_dict()['username']))
+        batch.delete(rollups_ref)
+        batch.delete(db.collection('user_details').document(user_id))
+        batch.delete(db.collection('users').document(user_id))
+        batch.commit()
+        return user.exists
+
+    def _apply_batches(self, user_id, work, batches):
+        """Runs work() over the batches in parallel, then rebuilds the user's rollups once."""
+        batches = iter(batches)
+        first = next(batches, None)
+        if first is None:
+            return
+        try:
+            yield from self._in_parallel(work, chain([first], batches))
+        finally:
+            # Rollups are rebuilt once instead of updated per entry
+            rebuild_rollups(self.db, user_id)
+
+    def _in_parallel(self, work, batches):
+        """Yields the running total of work(batch) as batches complete on up to write_workers threads."""
+        total = 0
+        pool = ThreadPoolExecutor(self.write_workers)
+        pending = set()
+        try:
+            for batch in batches:
+                pending.add(pool.submit(work, batch))
+                if len(pending) < self.write_workers:
+                    continue
+                # Read ahead no further than the batches already in flight
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    total += future.result()
+                    yield total
+            for future in as_completed(pending):
+                total += future.result()
+                yield total
+        finally:
+            pool.shutdown()
+
+    def _progress_pages(self, user_id, start=None, end=None):
+        """Yields references to the user's entries in [start, end], a batch at a time.
+
+        Each page is a separate keyset query, so no stream stays open and
+        only the pages in flight are held in memory.
+        """
+        after = None
+        while True:
+            query = self.db.collection('progress').where('user_id', '==', user_id)
+            if start is not None:
+                query = query.where('date', '>=', start)
+            if end is not None:
+                query = query.where('date', '<=', end)
+            query = query.order_by('date').order_by('__name__').select(['date']).limit(BATCH_LIMIT)
+            if after is not None:
+                query = query.start_after({'date': after.get('date'), '__name__': after.id})
+            page = list(query.stream())
+            if page:
+                yield [doc.reference for doc in page]
+            if len(page) < BATCH_LIMIT:
+                return
+            after = page[-1]
+
+    def _owned_entries(self, user_id, entry_ids):
+        """Yields references to those of entry_ids that belong to the user, a batch at a time."""
+        db = self.db
+        refs = []
+        entry_ids = [entry_id for entry_id in dict.fromkeys(entry_ids) if entry_id and '/' not in entry_id]
+        for chunk in chunked(entry_ids, IN_LIMIT):
+            # Ownership is part of the query; other users' entries never match
+            query = (db.collection('progress')
+                     .where('user_id', '==', user_id)
+                     .where('__name__', 'in', [db.collection('progress').document(entry_id) for entry_id in chunk])
+                     .select([]))
+            refs.extend(doc.reference for doc in query.stream())
+            if len(refs) >= BATCH_LIMIT:
+                yield refs[:BATCH_LIMIT]
+                refs = refs[BATCH_LIMIT:]
+        if refs:
+            yield refs
+
+    def _write_progress(self, entries):
+        db = self.db
+        batch = db.batch()
+        for entry in entries:
+            batch.set(db.collection('progress').document(), to_firestore(entry))
+        batch.commit()
+        return len(entries)
+
+    def _delete_docs(self, refs):
+        batch = self.db.batch()
+        for ref in refs:
+            batch.delete(ref)
+        batch.commit()
+        return len(refs)
+
+    def recent_progress(self, user_id, limit):
+        query = (self.db.collection('progress')
+                 .where('user_id', '==', user_id)
+                 .order_by('date', direction=firestore.Query.DESCENDING)
+                 .limit(limit))
+        return [{'id': doc.id, **doc.to_dict()} for doc in query.stream()]
+
+    def progress_range(self, user_id, start, end, fields=None):
+        query = (self.db.collection('progress')
+                 .where('user_id', '==', user_id)
+                 .where('date', '>=', start).where('date', '<=', end)
+                 .order_by('date')
+                 .select(fields or PROGRESS_FIELDS))
+        return [{'id': doc.id, **doc.to_dict()} for doc in query.stream()]
+
+    def iter_progress(self, user_id, fields=None):
+        query = (self.db.collection('progress')
+                 .where('user_id', '==', user_id)
+                 .order_by('date')
+                 .select(fields or PROGRESS_FIELDS))
+        for doc in query.stream():
+            yield {'id': doc.id, **doc.to_dict()}
+
+    def progress_page(self, user_id, limit, order='date', after=None, after_id=None):
+        query = progress_page_query(self.db, user_id, limit, order, after, after_id)
+        return [{'id': doc.id, **doc.to_dict()} for doc in query.stream()]
+
+    def progress_summary(self, user_id):
+        return get_rollup(self.db, user_id)
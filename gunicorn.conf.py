@@ -0,0 +1,50 @@
+"""Gunicorn settings for the Flask app; gunicorn reads this file by default.
+
+    gunicorn app:app
+
+The app is preloaded in the master so each worker forks a warm copy
+instead of importing it again. Nothing in app.py connects to anything at
+import: the Firestore and Gemini clients, the PDF render pool and the
+plan job threads are all created on first use. post_fork() also drops
+any that the master did create, since gRPC channels are not fork-safe,
+so every worker opens its own pool of connections.
+
+Tune with environment variables:
+
+    WEB_CONCURRENCY        worker processes (default 2)
+    GUNICORN_THREADS       threads per worker (default 4)
+    FIRESTORE_POOL_SIZE    Firestore clients per worker (default 2)
+    LLM_POOL_SIZE          Gemini clients per worker (default 2)
+    CLIENT_CHECK_INTERVAL  seconds before an idle client is health-checked (default 60)
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+
+# Threads share the worker's client pools; requests mostly wait on the network
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+preload_app = True
+
+# Streamed plan generations can hold a request open for a while
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then to bound memory growth; worker_exit lets plan
+# jobs finish first (PLAN_DRAIN_TIMEOUT, under graceful_timeout) and marks
+# any left unfinished as failed
+max_requests = 1000
+max_requests_jitter = 100
+
+
+def post_fork(server, worker):
+    from app import after_fork
+    after_fork()
+
+
+def worker_exit(server, worker):
+    from app import shutdown_clients
+    shutdown_clients()
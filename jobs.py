@@ -0,0 +1,102 @@
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+
+class JobQueue:
+    """In-memory job queue drained by a pool of worker threads.
+
+    Workers are started lazily on the first submit so that nothing is
+    running when gunicorn forks its workers.
+    """
+
+    def __init__(self, workers=2, max_history=1000):
+        self.workers = workers
+        self.max_history = max_history
+        self.queue = queue.Queue()
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.threads = []
+
+    def start(self):
+        with self.lock:
+            if self.threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def after_fork(self):
+        """Starts over in a forked child: the parent's worker threads do not exist here."""
+        self.queue = queue.Queue()
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.threads = []
+
+    def submit(self, func, *args, owner=None, **kwargs):
+        """Queues func(*args, **kwargs) and returns the new job id."""
+        self.start()
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self.jobs[job_id] = {
+                'id': job_id,
+                'owner': owner,
+                'status': 'queued',
+                'created_at': datetime.now(),
+                'finished_at': None,
+                'error': None
+            }
+            self._prune()
+        self.queue.put((job_id, func, args, kwargs))
+        return job_id
+
+    def drain(self, timeout):
+        """Waits up to timeout seconds for queued and running jobs to finish.
+
+        Returns the jobs still unfinished at the deadline. Worker threads are
+        daemons, so those die with the process.
+        """
+        deadline = time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.queue.all_tasks_done.wait(remaining)
+        with self.lock:
+            return [dict(job) for job in self.jobs.values() if job['status'] in ('queued', 'running')]
+
+    def status(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _set(self, job_id, **fields):
+        with self.lock:
+            if job_id in self.jobs:
+                self.jobs[job_id].update(fields)
+
+    def _prune(self):
+        # Drop the oldest finished jobs once the history is full
+        if len(self.jobs) <= self.max_history:
+            return
+        finished = [j for j in self.jobs.values() if j['status'] in ('done', 'failed')]
+        finished.sort(key=lambda j: j['created_at'])
+        for job in finished[:len(self.jobs) - self.max_history]:
+            del self.jobs[job['id']]
+
+    def _worker(self):
+        while True:
+            job_id, func, args, kwargs = self.queue.get()
+            self._set(job_id, status='running')
+            try:
+                func(*args, **kwargs)
+                self._set(job_id, status='done', finished_at=datetime.now())
+            except Exception as e:
+                print(f"Error running job {job_id}: {str(e)}")
+                self._set(job_id, status='failed', error=str(e), finished_at=datetime.now())
+            finally:
+                self.queue.task_done()
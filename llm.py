@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from clients import ClientPool
+
+FAKE_PLAN_TEXT = """
+FAKE PLAN (Offline Model)
+
+Monday: Upper Body
+- Bench Press: 3x8-12
+- Rows: 3x8-12
+
+Wednesday: Lower Body
+- Squats: 3x8-12
+- Lunges: 3x8-12
+
+Friday: Full Body
+- Pull-ups: 3x8-12
+- Push-ups: 3x8-12
+"""
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Offline stand-in for GenerativeModel, used for local runs and load tests.
+
+    get_model() returns a new instance per generation, so calls counts the
+    generate_content() calls of all instances, like upstream requests.
+    """
+
+    calls = 0
+    calls_lock = threading.Lock()
+
+    def __init__(self, model_name='gemini-pro', delay=None):
+        self.model_name = model_name
+        self.delay = float(os.getenv('FAKE_LLM_DELAY', 0)) if delay is None else delay
+
+    def generate_content(self, prompt, stream=False):
+        with FakeGenerativeModel.calls_lock:
+            FakeGenerativeModel.calls += 1
+        if stream:
+            return self._stream()
+        if self.delay:
+            time.sleep(self.delay)
+        return FakeResponse(FAKE_PLAN_TEXT)
+
+    def _stream(self):
+        lines = FAKE_PLAN_TEXT.splitlines(keepends=True)
+        for line in lines:
+            if self.delay:
+                time.sleep(self.delay / len(lines))
+            yield FakeResponse(line)
+
+
+def use_fake_model():
+    """True when FAKE_LLM is set, so the app runs without a Gemini key."""
+    return os.getenv('FAKE_LLM', '').lower() in ('1', 'true', 'yes')
+
+
+def close_stream(response):
+    """Stops an unfinished streaming response so the upstream call is released."""
+    close = getattr(response, 'close', None)
+    if close:
+        close()
+    # Gemini streaming responses wrap a gRPC stream that must be cancelled
+    iterator = getattr(response, '_iterator', None)
+    cancel = getattr(iterator, 'cancel', None)
+    if cancel:
+        cancel()
+
+
+_configure_lock = threading.Lock()
+_configured = False
+
+
+def configure_gemini():
+    """Configures the Gemini SDK from GOOGLE_API_KEY, once, on first use."""
+    global _configured
+    with _configure_lock:
+        if not _configured:
+            import google.generativeai as genai
+            genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
+            _configured = True
+
+
+def new_generative_client():
+    """Opens a Gemini client with its own channel, instead of the SDK's shared default."""
+    configure_gemini()
+    from google.generativeai import client
+    return client._client_manager.make_client('generative')
+
+
+def generative_client_healthy(client):
+    """Health check: waits for the client's gRPC channel to connect, without an API call."""
+    channel = getattr(client.transport, 'grpc_channel', None)
+    if channel is None:
+        return True
+    import grpc
+    grpc.channel_ready_future(channel).result(timeout=5)
+    return True
+
+
+# Gemini connections reused across requests, per worker process
+generative_clients = ClientPool(
+    new_generative_client,
+    size=int(os.getenv('LLM_POOL_SIZE', 2)),
+    check=generative_client_healthy,
+    check_interval=int(os.getenv('CLIENT_CHECK_INTERVAL', 60)),
+    close=lambda client: client.transport.close()
+)
+
+
+def get_model(model_name='gemini-pro'):
+    """Returns the model used for plan generation, on a pooled client."""
+    if use_fake_model():
+        return FakeGenerativeModel(model_name)
+    from google.generativeai import GenerativeModel
+    model = GenerativeModel(model_name)
+    model._client = generative_clients.get()
+    return model
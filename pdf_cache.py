@@ -0,0 +1,59 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pdf_spec import TEMPLATE_VERSION
+
+
+def pdf_cache_key(kind, text, user_data, fields):
+    """Hash of everything that affects a rendered PDF; also used as its ETag."""
+    profile = {field: user_data.get(field) for field in fields}
+    payload = json.dumps([TEMPLATE_VERSION, kind, text, profile], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class PdfCache:
+    """In-memory LRU of rendered PDFs, bounded by total bytes."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Returns (pdf_bytes, last_modified) or None."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, data):
+        entry = (data, datetime.now(timezone.utc).replace(microsecond=0))
+        if len(data) > self.max_bytes:
+            return entry
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= len(self.entries.pop(key)[0])
+            self.entries[key] = entry
+            self.bytes += len(data)
+            while self.bytes > self.max_bytes:
+                _, (old, _) = self.entries.popitem(last=False)
+                self.bytes -= len(old)
+        return entry
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -0,0 +1,144 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from pdf_spec import PROFILE_FIELDS
+
+
+class RenderUnavailable(Exception):
+    """Raised when a render is rejected by the queue cap or times out."""
+
+
+def render_pdf(kind, content, profile):
+    """Renders a document to bytes. Runs in the worker processes.
+
+    content is the plan text, or for a bundle a dict with plan, meal_plan
+    and progress rows.
+    """
+    # Imported here so only the render workers load ReportLab
+    from pdf import create_fitness_plan_pdf, create_meal_plan_pdf, create_bundle_pdf
+    if kind == 'fitness':
+        return create_fitness_plan_pdf(profile, content).getvalue()
+    if kind == 'bundle':
+        return create_bundle_pdf(profile, content['plan'], content['meal_plan'], content['progress']).getvalue()
+    return create_meal_plan_pdf(content, profile).getvalue()
+
+
+def profile_fields(kind, user_data):
+    """Picks the plain, picklable profile fields a document renders."""
+    fields = PROFILE_FIELDS[kind]
+    return {field: user_data[field] for field in fields if field in user_data}
+
+
+def stop_pool(executor):
+    """Shuts a pool down and terminates its processes, ending renders that are still running.
+
+    Their futures then fail with BrokenProcessPool. ProcessPoolExecutor
+    only has a public way to do this from Python 3.14.
+    """
+    terminate = getattr(executor, 'terminate_workers', None)
+    if terminate is not None:
+        terminate()
+        return
+    processes = list((getattr(executor, '_processes', None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+class PdfRenderService:
+    """Renders PDFs in a process pool so ReportLab does not stall request threads.
+
+    With workers=0 rendering happens inline in the calling thread. The pool
+    uses spawned processes and is created on first use, after any fork.
+
+    A render holds one of max_pending slots until it actually ends. A
+    running render cannot be cancelled, so when one times out its pool is
+    retired: new renders go to a fresh pool, the renders still running in
+    the old one are left to finish, and its processes are terminated once
+    every render it has left has timed out too.
+    """
+
+    def __init__(self, workers=2, timeout=30, max_pending=16):
+        self.workers = workers
+        self.timeout = timeout
+        self.pending = threading.BoundedSemaphore(max_pending)
+        self.executor = None
+        # Renders of each pool that have neither finished nor timed out
+        self.live = {}
+        self.lock = threading.Lock()
+
+    def _pool(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                self.live[self.executor] = set()
+            return self.executor
+
+    def render(self, kind, content, user_data):
+        profile = profile_fields(kind, user_data)
+        if not self.workers:
+            return render_pdf(kind, content, profile)
+
+        if not self.pending.acquire(blocking=False):
+            raise RenderUnavailable("Too many PDFs are being rendered")
+        executor = self._pool()
+        try:
+            future = executor.submit(render_pdf, kind, content, profile)
+        except BrokenProcessPool:
+            self.pending.release()
+            self._retire(executor)
+            raise RenderUnavailable("PDF render pool was restarted, please try again")
+        except BaseException:
+            self.pending.release()
+            raise
+        with self.lock:
+            self.live[executor].add(future)
+        future.add_done_callback(lambda _: self._settle(executor, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            self._retire(executor, future)
+            raise RenderUnavailable(f"PDF rendering timed out after {self.timeout}s")
+        except BrokenProcessPool:
+            self._retire(executor)
+            raise RenderUnavailable("PDF render pool was restarted, please try again")
+
+    def _settle(self, executor, future):
+        """Done callback: frees the render's slot and stops a retired pool that has nothing left to finish."""
+        self.pending.release()
+        self._forget(executor, future)
+
+    def _retire(self, executor, timed_out=None):
+        """Sends new renders to a fresh pool; the old one is stopped once it has no live renders."""
+        with self.lock:
+            if self.executor is executor:
+                self.executor = None
+        self._forget(executor, timed_out)
+
+    def _forget(self, executor, future):
+        with self.lock:
+            live = self.live.get(executor)
+            if live is None:
+                return
+            live.discard(future)
+            if live or self.executor is executor:
+                return
+            del self.live[executor]
+        stop_pool(executor)
+
+    def after_fork(self):
+        """Forgets a pool inherited from the parent process; a new one starts on first use."""
+        self.executor = None
+        self.live = {}
+        self.lock = threading.Lock()
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.live.pop(self.executor, None)
+                self.executor = None
@@ -0,0 +1,18 @@
+"""What each PDF document renders, without importing ReportLab.
+
+The web process needs these for cache keys and ETags; only the render
+workers load pdf.py.
+"""
+
+# Bump whenever the layout changes so cached PDFs are re-rendered
+TEMPLATE_VERSION = 2
+
+# Profile fields rendered into each document, used for cache keys
+FITNESS_PROFILE_FIELDS = ('goal', 'weight', 'height', 'current_calories', 'workout_split')
+MEAL_PROFILE_FIELDS = ('goal', 'current_calories', 'weight', 'work_type')
+BUNDLE_PROFILE_FIELDS = ('goal', 'weight', 'height', 'current_calories', 'workout_split', 'work_type')
+PROFILE_FIELDS = {
+    'fitness': FITNESS_PROFILE_FIELDS,
+    'meal': MEAL_PROFILE_FIELDS,
+    'bundle': BUNDLE_PROFILE_FIELDS
+}
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+
+def normalize_value(value):
+    """Normalizes a prompt input so equivalent profiles hash the same."""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        # repr keeps every digit, so only equal numbers share a key (80 and 80.0 do)
+        return repr(float(value))
+    return ' '.join(str(value).split()).casefold()
+
+
+def plan_cache_key(kind, inputs):
+    """Returns a content hash of the plan kind and its prompt inputs."""
+    normalized = {name: normalize_value(value) for name, value in inputs.items()}
+    payload = json.dumps([kind, normalized], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class MemoryCacheBackend:
+    """In-process LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries=512, ttl=7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class FirestoreCacheBackend:
+    """Stores plans in the plan_cache collection, shared by all instances.
+
+    Expired documents are ignored on read; configure a Firestore TTL policy
+    on expires_at to have them removed. get_db returns the Firestore client
+    and is only called once the cache is used.
+    """
+
+    def __init__(self, get_db, collection='plan_cache', ttl=7 * 24 * 3600):
+        self.get_db = get_db
+        self.name = collection
+        self.ttl = ttl
+
+    @property
+    def collection(self):
+        return self.get_db().collection(self.name)
+
+    def get(self, key):
+        doc = self.collection.document(key).get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        if data['expires_at'] < datetime.now(timezone.utc):
+            return None
+        return data['text']
+
+    def set(self, key, value):
+        self.collection.document(key).set({
+            'text': value,
+            'expires_at': datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+        })
+
+
+class PlanCache:
+    """Caches generated plans by a hash of their normalized prompt inputs."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, kind, inputs):
+        try:
+            value = self.backend.get(plan_cache_key(kind, inputs))
+        except Exception as e:
+            print(f"Error reading plan cache: {str(e)}")
+            value = None
+        with self.lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, kind, inputs, value):
+        try:
+            self.backend.set(plan_cache_key(kind, inputs), value)
+        except Exception as e:
+            print(f"Error writing plan cache: {str(e)}")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0
+        }
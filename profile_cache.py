@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def estimate_size(value):
+    """Approximate in-memory size of a Firestore document in bytes."""
+    if isinstance(value, str):
+        return 49 + len(value.encode('utf-8'))
+    if isinstance(value, bytes):
+        return 33 + len(value)
+    if isinstance(value, dict):
+        return 64 + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return 56 + sum(estimate_size(v) for v in value)
+    return 32
+
+
+class ProfileCache:
+    """Process-wide LRU of user_details documents, bounded by total bytes.
+
+    A hit costs no storage read. Writes made through this worker update or
+    invalidate its entry; every gunicorn worker has its own cache, though,
+    so a write made by another worker is seen once the entry expires, ttl
+    seconds after it was cached. Reads that must see other workers' writes
+    go to storage directly (UnitOfWork.get with fresh=True).
+
+    A read that races with a local write must not cache the old document:
+    generation() is taken before the read and put() drops the result if
+    the key was invalidated since. Invalidations are remembered for
+    max_read_seconds only; results of reads that took longer are not
+    cached, so the record of them stays bounded.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, ttl=300, max_read_seconds=60):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_read_seconds = max_read_seconds
+        self.entries = OrderedDict()
+        self.invalidations = OrderedDict()
+        self.clock = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def lookup(self, user_id):
+        """Returns (hit, data); data is None for a cached missing document."""
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None or entry[2] < time.monotonic():
+                if entry is not None:
+                    self._remove(user_id)
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(user_id)
+            self.hits += 1
+            return True, entry[0]
+
+    def generation(self, user_id):
+        """Token to pass to put() for a read that starts now."""
+        with self.lock:
+            self.clock += 1
+            return self.clock, time.monotonic()
+
+    def put(self, user_id, data, generation, size=None):
+        if size is None:
+            size = estimate_size(data) if data is not None else 64
+        started, started_at = generation
+        with self.lock:
+            self._forget_invalidations()
+            if started_at < time.monotonic() - self.max_read_seconds or size > self.max_bytes:
+                return
+            if self.invalidations.get(user_id, (0, 0))[0] > started:
+                return
+            if user_id in self.entries:
+                self._remove(user_id)
+            self.entries[user_id] = (data, size, time.monotonic() + self.ttl)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def store(self, user_id, data):
+        """Caches a document this worker has just written, superseding reads still in flight."""
+        self.invalidate(user_id)
+        self.put(user_id, data, self.generation(user_id))
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.clock += 1
+            self.invalidations.pop(user_id, None)
+            self.invalidations[user_id] = (self.clock, time.monotonic())
+            self._forget_invalidations()
+            if user_id in self.entries:
+                self._remove(user_id)
+
+    def _forget_invalidations(self):
+        # Reads that started before these have run too long to be cached anyway
+        horizon = time.monotonic() - self.max_read_seconds
+        while self.invalidations and next(iter(self.invalidations.values()))[1] < horizon:
+            self.invalidations.popitem(last=False)
+
+    def _remove(self, user_id):
+        _, size, _ = self.entries.pop(user_id)
+        self.bytes -= size
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0,
+                'evictions': self.evictions,
+                'invalidations': len(self.invalidations)
+            }
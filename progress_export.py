@@ -0,0 +1,60 @@
+"""Streaming export of a user's progress history as CSV or Parquet.
+
+Both formats are produced from an iterator over storage.iter_progress(),
+so only the chunk being encoded is held in memory, however long the
+history is. The columns match what progress_import reads back.
+"""
+import csv
+from io import StringIO
+from streaming import ChunkBuffer
+
+EXPORT_FIELDS = ['date', 'weight', 'calories_eaten', 'workout_completed']
+
+
+def iter_progress_csv(entries, chunk_size=64 * 1024):
+    """Yields CSV bytes a row at a time, flushed in chunks of about chunk_size."""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for entry in entries:
+        writer.writerow([entry['date'].isoformat(), entry['weight'], entry['calories_eaten'],
+                         entry.get('workout_completed')])
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def iter_progress_parquet(entries, row_group_size=64 * 1024):
+    """Returns an iterator of Parquet bytes, written one row group of row_group_size entries at a time.
+
+    pyarrow is imported here, before the first byte is produced, so a
+    missing install fails the request instead of the stream.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = pa.schema([
+        ('date', pa.timestamp('us', tz='UTC')),
+        ('weight', pa.float64()),
+        ('calories_eaten', pa.int64()),
+        ('workout_completed', pa.string())
+    ])
+
+    def row_groups():
+        sink = ChunkBuffer()
+        with pq.ParquetWriter(sink, schema) as writer:
+            columns = {field: [] for field in EXPORT_FIELDS}
+            for entry in entries:
+                for field in EXPORT_FIELDS:
+                    columns[field].append(entry.get(field))
+                if len(columns['date']) == row_group_size:
+                    writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+                    columns = {field: [] for field in EXPORT_FIELDS}
+                    yield sink.drain()
+            if columns['date']:
+                writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+        # Closing the writer adds the footer
+        yield sink.drain()
+
+    return row_groups()
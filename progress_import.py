@@ -0,0 +1,154 @@
+"""Bulk import of progress entries from CSV or JSON files.
+
+Rows are parsed as the file is read and handed to the storage backend in
+batches, so an import of any size holds only a few batches in memory.
+The columns are the ones the progress CSV export writes: date, weight,
+calories_eaten and workout_completed.
+"""
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from storage import SERVER_TIMESTAMP
+
+MAX_ERRORS = 20
+EARLIEST = datetime(1900, 1, 1, tzinfo=timezone.utc)
+
+
+def import_format(filename):
+    """Guesses 'csv' or 'json' from a file name."""
+    return 'json' if filename.lower().endswith(('.json', '.jsonl', '.ndjson')) else 'csv'
+
+
+def read_rows(stream, file_format):
+    """Yields the rows of a binary file stream in the given format."""
+    return iter_json_rows(stream) if file_format == 'json' else iter_csv_rows(stream)
+
+
+def iter_csv_rows(stream):
+    """Yields each row of a CSV file with a header row as a dict."""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        for row in csv.DictReader(text):
+            yield {key: value for key, value in row.items() if key is not None}
+    finally:
+        text.detach()
+
+
+def iter_json_rows(stream, chunk_size=64 * 1024):
+    """Yields the values of a JSON array, or of JSON Lines, reading a chunk at a time."""
+    decoder = json.JSONDecoder()
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig')
+    buffer, pos, eof = '', 0, False
+    array = None
+    try:
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) and array is None:
+                array = buffer[pos] == '['
+                if array:
+                    pos += 1
+                continue
+            if pos < len(buffer) and array and buffer[pos] == ']':
+                return
+            if pos < len(buffer):
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError as e:
+                    if eof:
+                        raise ValueError(f"Invalid JSON: {e}")
+                    end = None
+                # A value that runs to the end of the buffer may continue in the next chunk
+                if end is not None and (end < len(buffer) or eof):
+                    pos = end
+                    yield value
+                    continue
+            elif eof:
+                if array:
+                    raise ValueError("Invalid JSON: the array is not closed")
+                return
+            chunk = text.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+    finally:
+        text.detach()
+
+
+def parse_date(value):
+    if not isinstance(value, str):
+        raise ValueError("date must be an ISO 8601 date")
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"invalid date {value!r}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    parsed = parsed.astimezone(timezone.utc)
+    if not EARLIEST <= parsed <= datetime.now(timezone.utc) + timedelta(days=1):
+        raise ValueError(f"date {value!r} is out of range")
+    return parsed
+
+
+def parse_entry(row):
+    """Validates one imported row and returns its progress fields; raises ValueError."""
+    if not isinstance(row, dict):
+        raise ValueError("not an object")
+    row = {str(key).strip().lower(): value for key, value in row.items()}
+    missing = [field for field in ('date', 'weight', 'calories_eaten') if row.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+
+    try:
+        weight = float(row['weight'])
+    except (TypeError, ValueError):
+        raise ValueError("weight must be a number")
+    if not 0 < weight < 1000:
+        raise ValueError("weight is out of range")
+    try:
+        calories = int(float(row['calories_eaten']))
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("calories_eaten must be a number")
+    if not 0 <= calories <= 50000:
+        raise ValueError("calories_eaten is out of range")
+
+    return {
+        'date': parse_date(row['date']),
+        'weight': weight,
+        'calories_eaten': calories,
+        'workout_completed': str(row.get('workout_completed') or 'no').strip().lower()
+    }
+
+
+def import_rows(storage, user_id, rows):
+    """Imports rows for a user, yielding a report after each written batch.
+
+    Rows whose calendar day (UTC) already has an entry, in storage or
+    earlier in the file, are skipped. The last report has done=True.
+    """
+    report = {'rows': 0, 'imported': 0, 'duplicates': 0, 'invalid': 0, 'errors': [], 'done': False}
+    existing = storage.progress_range(user_id, EARLIEST, datetime.now(timezone.utc) + timedelta(days=1), ['date'])
+    seen = {entry['date'].astimezone(timezone.utc).date() for entry in existing}
+
+    def entries():
+        for number, row in enumerate(rows, 1):
+            report['rows'] = number
+            try:
+                entry = parse_entry(row)
+            except ValueError as e:
+                report['invalid'] += 1
+                if len(report['errors']) < MAX_ERRORS:
+                    report['errors'].append(f"row {number}: {e}")
+                continue
+            day = entry['date'].date()
+            if day in seen:
+                report['duplicates'] += 1
+                continue
+            seen.add(day)
+            yield {'user_id': user_id, **entry, 'created_at': SERVER_TIMESTAMP}
+
+    for written in storage.import_progress(user_id, entries()):
+        report['imported'] = written
+        yield dict(report)
+    report['done'] = True
+    yield dict(report)
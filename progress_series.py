@@ -0,0 +1,149 @@
+"""Compact in-memory form of a user's progress history.
+
+A list of entry dicts costs several hundred bytes per point; a
+ProgressSeries keeps the columns the charts and analytics read in flat
+typed buffers instead, about 12 bytes per point:
+
+  days      int32 days since 1970-01-01 (UTC)
+  weights   float32
+  calories  int32
+  workouts  one bit per entry, set when a workout was completed
+
+The buffers are array.array objects, so a series can be built without
+numpy; the column accessors return numpy arrays over them without
+copying.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta, timezone
+from storage import workout_done
+
+EPOCH_DAY = date(1970, 1, 1)
+
+
+def epoch_day(value):
+    """Days since 1970-01-01 of a datetime (naive ones are UTC, as storage has them) or a date."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp() // 86400)
+    return (value - EPOCH_DAY).days
+
+
+def day_date(day):
+    """The date of an epoch day."""
+    return EPOCH_DAY + timedelta(days=int(day))
+
+
+class ProgressSeries:
+    """Progress entries in date order, held column-wise in typed buffers.
+
+    between() returns a view that shares the buffers, as do days(),
+    weights() and calories(). Like array.array itself, the series cannot
+    grow while a numpy array from one of those accessors is alive, and a
+    view cannot be appended to.
+    """
+
+    __slots__ = ('_days', '_weights', '_calories', '_workouts', '_start', '_stop', '_view')
+
+    def __init__(self):
+        self._days = array('i')
+        self._weights = array('f')
+        self._calories = array('i')
+        self._workouts = bytearray()
+        self._start = 0
+        self._stop = 0
+        self._view = False
+
+    @classmethod
+    def from_entries(cls, entries):
+        """Builds a series from progress entries ordered by date, as storage returns them."""
+        series = cls()
+        days, weights, calories, workouts = series._days, series._weights, series._calories, series._workouts
+        index, last, bits = 0, None, 0
+        # append() inlined, as this runs once per entry of a user's history
+        for entry in entries:
+            day = epoch_day(entry['date'])
+            if last is not None and day < last:
+                raise ValueError("Progress entries must be appended in date order")
+            days.append(day)
+            weights.append(entry['weight'])
+            calories.append(int(entry['calories_eaten']))
+            if workout_done(entry.get('workout_completed')):
+                bits |= 1 << (index & 7)
+            index += 1
+            if index & 7 == 0:
+                workouts.append(bits)
+                bits = 0
+            last = day
+        if index & 7:
+            workouts.append(bits)
+        series._stop = index
+        return series
+
+    def append(self, when, weight, calories, workout_completed=None):
+        """Adds an entry dated no earlier than the last one; raises ValueError otherwise.
+
+        Either every column grows or none does: a value of the wrong type,
+        or a column whose buffer a numpy array still holds (BufferError),
+        leaves the series as it was.
+        """
+        if self._view:
+            raise ValueError("Cannot append to a view of a progress series")
+        day = epoch_day(when)
+        index = self._stop
+        if index and day < self._days[-1]:
+            raise ValueError("Progress entries must be appended in date order")
+        # Converted first, so a bad value is rejected before any column changes
+        row = (array('i', [day]), array('f', [weight]), array('i', [int(calories)]))
+        columns = (self._days, self._weights, self._calories)
+        grown = 0
+        try:
+            for column, value in zip(columns, row):
+                column.extend(value)
+                grown += 1
+            if index % 8 == 0:
+                self._workouts.append(0)
+        except BaseException:
+            for column in columns[:grown]:
+                del column[-1]
+            raise
+        if workout_done(workout_completed):
+            self._workouts[index >> 3] |= 1 << (index & 7)
+        self._stop = index + 1
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def between(self, start, end):
+        """A view of the entries from start to end inclusive (datetimes or dates)."""
+        lo = bisect_left(self._days, epoch_day(start), self._start, self._stop)
+        hi = bisect_right(self._days, epoch_day(end), lo, self._stop)
+        view = ProgressSeries.__new__(ProgressSeries)
+        view._days, view._weights, view._calories, view._workouts = self._days, self._weights, self._calories, self._workouts
+        view._start, view._stop, view._view = lo, hi, True
+        return view
+
+    def days(self):
+        import numpy as np
+        return np.frombuffer(self._days, dtype=np.int32)[self._start:self._stop]
+
+    def weights(self):
+        import numpy as np
+        return np.frombuffer(self._weights, dtype=np.float32)[self._start:self._stop]
+
+    def calories(self):
+        import numpy as np
+        return np.frombuffer(self._calories, dtype=np.int32)[self._start:self._stop]
+
+    def workouts(self):
+        """Booleans, unpacked from the bitset; unlike the other columns this is a copy."""
+        import numpy as np
+        bits = np.unpackbits(np.frombuffer(self._workouts, dtype=np.uint8), bitorder='little')
+        return bits[self._start:self._stop].astype(bool)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the buffers, including the entries outside a view."""
+        return (self._days.itemsize * len(self._days) + self._weights.itemsize * len(self._weights) +
+                self._calories.itemsize * len(self._calories) + len(self._workouts))
@@ -0,0 +1,137 @@
+import random
+import threading
+import time
+
+
+class GenerationRejected(Exception):
+    """Raised when the limiter cannot admit a generation in time."""
+
+
+def is_quota_error(error):
+    """True for upstream 429 / quota exhausted errors."""
+    if type(error).__name__ in ('ResourceExhausted', 'TooManyRequests'):
+        return True
+    message = str(error).lower()
+    return '429' in message or 'quota' in message
+
+
+class TokenBucket:
+    """Token bucket refilled at rate_per_minute, holding at most burst tokens.
+
+    Not thread-safe on its own; GenerationLimiter guards it with its lock.
+    """
+
+    def __init__(self, rate_per_minute, burst=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst or max(1, rate_per_minute // 6)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now):
+        """Seconds until a token is available, 0 if one is available now."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class GenerationLimiter:
+    """Admission control in front of the Gemini client.
+
+    Caps concurrent generations and requests per minute. Callers over the
+    limit wait in a bounded queue and are rejected early when they cannot be
+    admitted before their deadline. Quota errors are retried with jittered
+    exponential backoff.
+    """
+
+    def __init__(self, max_in_flight=4, requests_per_minute=60, max_queue=32,
+                 max_retries=3, backoff_base=1.0, backoff_cap=20.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.bucket = TokenBucket(requests_per_minute)
+        self.cond = threading.Condition()
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.retries = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def acquire(self, deadline=None):
+        start = time.monotonic()
+        with self.cond:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise GenerationRejected("Generation queue is full")
+            self.waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = None
+                    if self.in_flight < self.max_in_flight:
+                        delay = self.bucket.delay(now)
+                        if delay == 0:
+                            self.bucket.take()
+                            self.in_flight += 1
+                            break
+                    remaining = None if deadline is None else deadline - now
+                    if remaining is not None and (remaining <= 0 or (delay is not None and delay > remaining)):
+                        self.rejected += 1
+                        raise GenerationRejected("Generation could not start before its deadline")
+                    waits = [t for t in (delay, remaining) if t is not None]
+                    self.cond.wait(min(waits) if waits else None)
+            finally:
+                self.waiting -= 1
+            waited = time.monotonic() - start
+            self.admitted += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def release(self):
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
+
+    def call(self, func, timeout=None):
+        """Runs func under the limiter, retrying quota errors until timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        attempt = 0
+        while True:
+            self.acquire(deadline)
+            try:
+                return func()
+            except Exception as e:
+                if not is_quota_error(e) or attempt >= self.max_retries:
+                    raise
+                backoff = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+                if deadline is not None and time.monotonic() + backoff > deadline:
+                    raise
+            finally:
+                self.release()
+            with self.cond:
+                self.retries += 1
+            attempt += 1
+            time.sleep(backoff)
+
+    def stats(self):
+        with self.cond:
+            return {
+                'in_flight': self.in_flight,
+                'queue_depth': self.waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'retries': self.retries,
+                'avg_wait': self.total_wait / self.admitted if self.admitted else 0,
+                'max_wait': self.max_wait
+            }
@@ -0,0 +1,243 @@
+from datetime import datetime, timedelta, timezone, date as date_type
+from firebase_admin import firestore
+from storage import workout_done
+
+ROLLUPS = 'progress_rollups'
+BATCH_LIMIT = 500
+
+
+def as_utc(value):
+    """Firestore stores naive datetimes as UTC and returns them timezone-aware."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def week_key(value):
+    year, week, _ = as_utc(value).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def month_key(value):
+    value = as_utc(value)
+    return f"{value.year}-{value.month:02d}"
+
+
+def bucket_range(period, key):
+    """Returns the [start, end) datetimes covered by a week or month bucket."""
+    if period == 'weeks':
+        year, week = key.split('-W')
+        start = date_type.fromisocalendar(int(year), int(week), 1)
+        start = datetime(start.year, start.month, start.day, tzinfo=timezone.utc)
+        return start, start + timedelta(days=7)
+    year, month = (int(part) for part in key.split('-'))
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+    return start, end
+
+
+def empty_rollup():
+    return {
+        'count': 0,
+        'weight_sum': 0.0,
+        'calories_sum': 0,
+        'workouts_completed': 0,
+        'weight_min': None,
+        'weight_max': None,
+        'first_date': None,
+        'first_weight': None,
+        'last_date': None,
+        'last_weight': None
+    }
+
+
+def apply_entry(rollup, entry):
+    """Returns a copy of rollup with one progress entry added."""
+    rollup = {**empty_rollup(), **(rollup or {})}
+    weight = float(entry['weight'])
+    entry_date = as_utc(entry['date'])
+
+    rollup['count'] += 1
+    rollup['weight_sum'] += weight
+    rollup['calories_sum'] += int(entry['calories_eaten'])
+    if workout_done(entry.get('workout_completed')):
+        rollup['workouts_completed'] += 1
+    rollup['weight_min'] = weight if rollup['weight_min'] is None else min(rollup['weight_min'], weight)
+    rollup['weight_max'] = weight if rollup['weight_max'] is None else max(rollup['weight_max'], weight)
+    if rollup['first_date'] is None or entry_date < as_utc(rollup['first_date']):
+        rollup['first_date'] = entry_date
+        rollup['first_weight'] = weight
+    if rollup['last_date'] is None or entry_date >= as_utc(rollup['last_date']):
+        rollup['last_date'] = entry_date
+        rollup['last_weight'] = weight
+    return rollup
+
+
+def remove_entry(rollup, entry):
+    """Returns a copy of rollup with one progress entry removed.
+
+    Returns None when the entry was the min/max or the first/last entry,
+    since those can only be recovered by rebuilding from the history.
+    """
+    if not rollup or rollup['count'] <= 1:
+        return {**(rollup or {}), **empty_rollup()}
+    weight = float(entry['weight'])
+    entry_date = as_utc(entry['date'])
+    if weight in (rollup['weight_min'], rollup['weight_max']):
+        return None
+    if entry_date in (as_utc(rollup['first_date']), as_utc(rollup['last_date'])):
+        return None
+
+    rollup = dict(rollup)
+    rollup['count'] -= 1
+    rollup['weight_sum'] -= weight
+    rollup['calories_sum'] -= int(entry['calories_eaten'])
+    if workout_done(entry.get('workout_completed')):
+        rollup['workouts_completed'] -= 1
+    return rollup
+
+
+def rollup_refs(db, user_id, entry_date):
+    """Returns (period, key, ref) for the totals and the entry's week and month."""
+    user_ref = db.collection(ROLLUPS).document(user_id)
+    week = week_key(entry_date)
+    month = month_key(entry_date)
+    return [
+        ('total', None, user_ref),
+        ('weeks', week, user_ref.collection('weeks').document(week)),
+        ('months', month, user_ref.collection('months').document(month))
+    ]
+
+
+def add_progress_entry(db, progress_data):
+    """Adds a progress entry and updates its rollups in one transaction.
+
+    A missing rollup document may predate history that is already stored,
+    so instead of starting it from this one entry it is rebuilt from the
+    history once the entry is written: all rollups when the totals are
+    missing, otherwise just the missing week or month.
+    """
+    user_id = progress_data['user_id']
+    entry_ref = db.collection('progress').document()
+    refs = rollup_refs(db, user_id, progress_data['date'])
+
+    @firestore.transactional
+    def apply(transaction):
+        snapshots = [ref.get(transaction=transaction) for _, _, ref in refs]
+        transaction.set(entry_ref, progress_data)
+        if not snapshots[0].exists:
+            return None
+        stale = []
+        for (period, key, ref), snapshot in zip(refs, snapshots):
+            if snapshot.exists:
+                transaction.set(ref, apply_entry(snapshot.to_dict(), progress_data))
+            else:
+                stale.append((period, key))
+        return stale
+
+    stale = apply(db.transaction())
+    if stale is None:
+        rebuild_rollups(db, user_id)
+    else:
+        for period, key in stale:
+            rebuild_bucket(db, user_id, period, key)
+    return entry_ref.id
+
+
+def delete_progress_entry(db, user_id, entry_id):
+    """Deletes a user's progress entry and updates its rollups.
+
+    Returns False when the entry does not exist or belongs to someone else.
+    """
+    entry_ref = db.collection('progress').document(entry_id)
+
+    @firestore.transactional
+    def apply(transaction):
+        entry_doc = entry_ref.get(transaction=transaction)
+        if not entry_doc.exists or entry_doc.to_dict()['user_id'] != user_id:
+            return False, []
+        entry = entry_doc.to_dict()
+        refs = rollup_refs(db, user_id, entry['date'])
+        snapshots = [ref.get(transaction=transaction) for _, _, ref in refs]
+        transaction.delete(entry_ref)
+        stale = []
+        for (period, key, ref), snapshot in zip(refs, snapshots):
+            if not snapshot.exists:
+                stale.append((period, key))
+                continue
+            rollup = remove_entry(snapshot.to_dict(), entry)
+            if rollup is None:
+                stale.append((period, key))
+            else:
+                transaction.set(ref, rollup)
+        return True, stale
+
+    deleted, stale = apply(db.transaction())
+    for period, key in stale:
+        rebuild_bucket(db, user_id, period, key)
+    return deleted
+
+
+def get_rollup(db, user_id):
+    """Returns the user's totals rollup, building it on first use."""
+    doc = db.collection(ROLLUPS).document(user_id).get()
+    if doc.exists:
+        return doc.to_dict()
+    return rebuild_rollups(db, user_id)
+
+
+def rebuild_bucket(db, user_id, period, key):
+    """Recomputes one rollup document from the user's progress history."""
+    query = db.collection('progress').where('user_id', '==', user_id)
+    user_ref = db.collection(ROLLUPS).document(user_id)
+    if period == 'total':
+        ref = user_ref
+    else:
+        start, end = bucket_range(period, key)
+        query = query.where('date', '>=', start).where('date', '<', end)
+        ref = user_ref.collection(period).document(key)
+
+    rollup = {'user_id': user_id, 'key': key}
+    for doc in query.stream():
+        rollup = apply_entry(rollup, doc.to_dict())
+    ref.set({**empty_rollup(), **rollup})
+
+
+def rebuild_rollups(db, user_id):
+    """Rebuilds the totals, week and month rollups for one user (backfill)."""
+    total = {'user_id': user_id, 'key': None, **empty_rollup()}
+    buckets = {'weeks': {}, 'months': {}}
+    for doc in db.collection('progress').where('user_id', '==', user_id).stream():
+        entry = doc.to_dict()
+        total = apply_entry(total, entry)
+        for period, key in (('weeks', week_key(entry['date'])), ('months', month_key(entry['date']))):
+            rollup = buckets[period].get(key) or {'user_id': user_id, 'key': key}
+            buckets[period][key] = apply_entry(rollup, entry)
+
+    user_ref = db.collection(ROLLUPS).document(user_id)
+    writes = [(user_ref, total)]
+    deletes = []
+    for period, rollups in buckets.items():
+        for key, rollup in rollups.items():
+            writes.append((user_ref.collection(period).document(key), rollup))
+        for existing in user_ref.collection(period).stream():
+            if existing.id not in rollups:
+                deletes.append(existing.reference)
+
+    batch = db.batch()
+    pending = 0
+    for ref, rollup in writes:
+        batch.set(ref, rollup)
+        pending += 1
+        if pending == BATCH_LIMIT:
+            batch.commit()
+            batch, pending = db.batch(), 0
+    for ref in deletes:
+        batch.delete(ref)
+        pending += 1
+        if pending == BATCH_LIMIT:
+            batch.commit()
+            batch, pending = db.batch(), 0
+    if pending:
+        batch.commit()
+    return total
@@ -0,0 +1,50 @@
+import threading
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for it and get the same result, or the same exception.
+    """
+
+    def __init__(self, timeout=120):
+        self.timeout = timeout
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def do(self, key, func, timeout=None):
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+
+        if leader:
+            try:
+                flight.result = func()
+            except Exception as e:
+                flight.error = e
+            finally:
+                with self.lock:
+                    del self.flights[key]
+                flight.done.set()
+        else:
+            wait = self.timeout if timeout is None else timeout
+            if not flight.done.wait(wait):
+                raise TimeoutError(f"Timed out after {wait}s waiting for in-flight generation")
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def in_flight(self):
+        with self.lock:
+            return len(self.flights)
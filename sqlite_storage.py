@@ -0,0 +1,283 @@
+import json
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from storage import DONE_VALUES, SERVER_TIMESTAMP, UsernameTaken, chunked
+
+PROGRESS_FIELDS = ['date', 'weight', 'calories_eaten', 'workout_completed']
+IMPORT_BATCH = 500
+DELETE_BATCH = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_details (
+    user_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS progress (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    date REAL NOT NULL,
+    weight REAL NOT NULL,
+    calories_eaten INTEGER NOT NULL,
+    workout_completed TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS progress_user_date ON progress (user_id, date);
+CREATE INDEX IF NOT EXISTS progress_user_created ON progress (user_id, created_at);
+"""
+
+
+def new_id():
+    return uuid.uuid4().hex[:20]
+
+
+def to_epoch(value):
+    if value is SERVER_TIMESTAMP:
+        return datetime.now(timezone.utc).timestamp()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def from_epoch(value):
+    return datetime.fromtimestamp(value, timezone.utc)
+
+
+INSERT_PROGRESS = ('INSERT INTO progress (id, user_id, date, weight, calories_eaten, workout_completed, created_at) '
+                   'VALUES (?, ?, ?, ?, ?, ?, ?)')
+
+
+def progress_row(entry_id, data):
+    return (entry_id, data['user_id'], to_epoch(data['date']), float(data['weight']),
+            int(data['calories_eaten']), data.get('workout_completed'),
+            to_epoch(data.get('created_at', SERVER_TIMESTAMP)))
+
+
+def encode_value(value):
+    if value is SERVER_TIMESTAMP:
+        value = datetime.now(timezone.utc)
+    if isinstance(value, datetime):
+        return {'$date': to_epoch(value)}
+    raise TypeError(f"Cannot store {type(value).__name__} in SQLite")
+
+
+def decode_object(value):
+    if len(value) == 1 and '$date' in value:
+        return from_epoch(value['$date'])
+    return value
+
+
+class SqliteStorage:
+    """Storage in a local SQLite file, for single-node deployments and benchmarks.
+
+    Progress is indexed on (user_id, date) so per-user range and latest-N
+    queries read only the rows they return, and on (user_id, created_at)
+    for delta sync; totals are aggregated on the
+    fly instead of kept in rollups. The database runs in WAL mode so readers
+    do not block the writer. Each thread gets its own connection.
+    """
+
+    def __init__(self, path='fittracker.db'):
+        self.path = path
+        self.local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def close(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+    def create_user(self, username, password):
+        user_id = new_id()
+        try:
+            with self._transaction() as conn:
+                conn.execute('INSERT INTO users (id, username, password, created_at) VALUES (?, ?, ?, ?)',
+                             (user_id, username, password, to_epoch(SERVER_TIMESTAMP)))
+        except sqlite3.IntegrityError:
+            raise UsernameTaken(username)
+        return user_id
+
+    def authenticate(self, username, password):
+        row = self._conn().execute('SELECT id, password FROM users WHERE username = ?', (username,)).fetchone()
+        return row['id'] if row is not None and row['password'] == password else None
+
+    def user_ids(self):
+        for row in self._conn().execute('SELECT id FROM users ORDER BY created_at'):
+            yield row['id']
+
+    def get_doc(self, collection, doc_id):
+        conn = self._conn()
+        if collection == 'users':
+            row = conn.execute('SELECT username, password, created_at FROM users WHERE id = ?', (doc_id,)).fetchone()
+            if row is None:
+                return None
+            return {'username': row['username'], 'password': row['password'], 'created_at': from_epoch(row['created_at'])}
+        if collection != 'user_details':
+            raise ValueError(f"Unknown collection {collection!r}")
+        row = conn.execute('SELECT data FROM user_details WHERE user_id = ?', (doc_id,)).fetchone()
+        return json.loads(row['data'], object_hook=decode_object) if row is not None else None
+
+    def write_docs(self, writes):
+        with self._transaction() as conn:
+            for collection, doc_id, op, data in writes:
+                if collection != 'user_details':
+                    raise ValueError(f"Cannot write to {collection!r}")
+                if op == 'update':
+                    row = conn.execute('SELECT data FROM user_details WHERE user_id = ?', (doc_id,)).fetchone()
+                    if row is None:
+                        raise LookupError(f"No user_details document to update: {doc_id}")
+                    data = {**json.loads(row['data']), **data}
+                conn.execute('INSERT OR REPLACE INTO user_details (user_id, data) VALUES (?, ?)',
+                             (doc_id, json.dumps(data, default=encode_value)))
+
+    def add_progress(self, data):
+        entry_id = new_id()
+        with self._transaction() as conn:
+            conn.execute(INSERT_PROGRESS, progress_row(entry_id, data))
+        return entry_id
+
+    def import_progress(self, user_id, entries):
+        # Totals are aggregated on read, so there is nothing to update at the end
+        written = 0
+        for batch in chunked(entries, IMPORT_BATCH):
+            with self._transaction() as conn:
+                conn.executemany(INSERT_PROGRESS, [progress_row(new_id(), data) for data in batch])
+            written += len(batch)
+            yield written
+
+    def delete_progress(self, user_id, entry_id):
+        with self._transaction() as conn:
+            cursor = conn.execute('DELETE FROM progress WHERE id = ? AND user_id = ?', (entry_id, user_id))
+        return cursor.rowcount > 0
+
+    def delete_progress_many(self, user_id, entry_ids=None, start=None, end=None):
+        deleted = 0
+        if entry_ids is not None:
+            for chunk in chunked(dict.fromkeys(entry_ids), DELETE_BATCH):
+                with self._transaction() as conn:
+                    cursor = conn.execute(
+                        f"DELETE FROM progress WHERE user_id = ? AND id IN ({', '.join('?' * len(chunk))})",
+                        (user_id, *chunk)
+                    )
+                deleted += cursor.rowcount
+            return deleted
+        where, params = 'user_id = ?', [user_id]
+        if start is not None:
+            where += ' AND date >= ?'
+            params.append(to_epoch(start))
+        if end is not None:
+            where += ' AND date <= ?'
+            params.append(to_epoch(end))
+        # Short transactions, so a large delete does not hold the write lock throughout
+        while True:
+            with self._transaction() as conn:
+                cursor = conn.execute(
+                    f'DELETE FROM progress WHERE rowid IN (SELECT rowid FROM progress WHERE {where} LIMIT ?)',
+                    (*params, DELETE_BATCH)
+                )
+            deleted += cursor.rowcount
+            if cursor.rowcount < DELETE_BATCH:
+                return deleted
+
+    def delete_user(self, user_id):
+        self.delete_progress_many(user_id)
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM user_details WHERE user_id = ?', (user_id,))
+            cursor = conn.execute('DELETE FROM users WHERE id = ?', (user_id,))
+        return cursor.rowcount > 0
+
+    def _entry(self, row):
+        entry = dict(row)
+        for field in ('date', 'created_at'):
+            if field in entry:
+                entry[field] = from_epoch(entry[field])
+        return entry
+
+    def recent_progress(self, user_id, limit):
+        rows = self._conn().execute(
+            'SELECT id, user_id, date, weight, calories_eaten, workout_completed, created_at FROM progress '
+            'WHERE user_id = ? ORDER BY date DESC, rowid DESC LIMIT ?', (user_id, limit)
+        )
+        return [self._entry(row) for row in rows]
+
+    def progress_range(self, user_id, start, end, fields=None):
+        columns = ', '.join(['id'] + [field for field in fields or PROGRESS_FIELDS if field in PROGRESS_FIELDS])
+        rows = self._conn().execute(
+            f'SELECT {columns} FROM progress WHERE user_id = ? AND date >= ? AND date <= ? ORDER BY date, rowid',
+            (user_id, to_epoch(start), to_epoch(end))
+        )
+        return [self._entry(row) for row in rows]
+
+    def iter_progress(self, user_id, fields=None):
+        columns = ', '.join(['id'] + [field for field in fields or PROGRESS_FIELDS if field in PROGRESS_FIELDS])
+        # The cursor fetches rows as the caller asks for them
+        for row in self._conn().execute(f'SELECT {columns} FROM progress WHERE user_id = ? ORDER BY date, rowid',
+                                        (user_id,)):
+            yield self._entry(row)
+
+    def progress_page(self, user_id, limit, order='date', after=None, after_id=None):
+        column = 'date' if order == 'date' else 'created_at'
+        # Newest date first, or oldest created_at first; ties go by id
+        op, direction = ('<', 'DESC') if order == 'date' else ('>', 'ASC')
+        where, params = 'user_id = ?', [user_id]
+        if after is not None and after_id is None:
+            where += f' AND {column} {op} ?'
+            params.append(to_epoch(after))
+        elif after is not None:
+            where += f' AND ({column} {op} ? OR ({column} = ? AND id {op} ?))'
+            params += [to_epoch(after), to_epoch(after), after_id]
+        rows = self._conn().execute(
+            'SELECT id, date, weight, calories_eaten, workout_completed, created_at FROM progress '
+            f'WHERE {where} ORDER BY {column} {direction}, id {direction} LIMIT ?', (*params, limit)
+        )
+        return [self._entry(row) for row in rows]
+
+    def progress_summary(self, user_id):
+        conn = self._conn()
+        done = ', '.join('?' * len(DONE_VALUES))
+        totals = conn.execute(
+            'SELECT COUNT(*) AS count, COALESCE(SUM(weight), 0.0) AS weight_sum, '
+            'COALESCE(SUM(calories_eaten), 0) AS calories_sum, '
+            f'COALESCE(SUM(lower(trim(workout_completed)) IN ({done})), 0) AS workouts_completed, '
+            'MIN(weight) AS weight_min, MAX(weight) AS weight_max '
+            'FROM progress WHERE user_id = ?', (*DONE_VALUES, user_id)
+        ).fetchone()
+        summary = dict(totals)
+        for prefix, order in (('first', 'ASC'), ('last', 'DESC')):
+            row = conn.execute(
+                f'SELECT date, weight FROM progress WHERE user_id = ? ORDER BY date {order}, rowid {order} LIMIT 1',
+                (user_id,)
+            ).fetchone()
+            summary[f'{prefix}_date'] = from_epoch(row['date']) if row else None
+            summary[f'{prefix}_weight'] = row['weight'] if row else None
+        return summary
@@ -0,0 +1,101 @@
+"""Storage backends for users, user_details and progress.
+
+Every backend provides the same methods:
+
+    create_user(username, password)          -> user id, or raises UsernameTaken
+    authenticate(username, password)         -> user id or None
+    user_ids()                               -> iterator of user ids
+    get_doc(collection, doc_id)              -> dict or None
+    write_docs(writes)                       -> applies (collection, doc_id, op, data)
+                                                writes atomically; op is 'set' or 'update'
+    add_progress(data)                       -> new entry id
+    delete_progress(user_id, entry_id)       -> False if missing or not the user's
+    delete_progress_many(user_id, entry_ids=None, start=None, end=None)
+                                             -> number deleted, of the listed entries or of
+                                                those dated in [start, end]; only the user's
+                                                own entries are touched
+    delete_user(user_id)                     -> deletes the account and everything it owns;
+                                                False if there was no such user
+    recent_progress(user_id, limit)          -> entries with 'id', newest first
+    progress_range(user_id, start, end, fields=None)
+                                             -> entries in [start, end], oldest first
+    iter_progress(user_id, fields=None)      -> generator over every entry with 'id', oldest
+                                                first, read from the backend as it is consumed
+    progress_page(user_id, limit, order='date', after=None, after_id=None)
+                                             -> up to limit entries with 'id' and 'created_at',
+                                                newest date first, or oldest created_at first
+                                                when order is 'created_at'; resumes after the
+                                                entry at (after, after_id), or after every entry
+                                                at after when after_id is None
+    import_progress(user_id, entries)        -> generator writing entries in batches, yielding
+                                                the running count after each batch; derived
+                                                totals are updated once, when it finishes
+    progress_summary(user_id)                -> totals shaped like rollups.empty_rollup()
+
+Dates come back as timezone-aware UTC datetimes; naive datetimes are
+treated as UTC, as Firestore does.
+"""
+from itertools import islice
+
+
+class ServerTimestamp:
+    """Placeholder replaced with the write time by the backend."""
+
+    def __repr__(self):
+        return 'SERVER_TIMESTAMP'
+
+
+SERVER_TIMESTAMP = ServerTimestamp()
+
+
+class UsernameTaken(Exception):
+    """Raised when registering a username that already has an index document."""
+
+
+def valid_username(username):
+    """Usernames double as document ids, so they must be valid Firestore ids."""
+    return bool(username) and '/' not in username and username not in ('.', '..') and not (
+        username.startswith('__') and username.endswith('__')
+    )
+
+
+# workout_completed answers that count as a completed workout, trimmed and lowercased
+DONE_VALUES = ('yes', 'true', 'on', '1', 'completed')
+
+
+def workout_done(value):
+    return str(value).strip().lower() in DONE_VALUES
+
+
+def chunked(items, size):
+    """Yields lists of up to size items from any iterable, reading it lazily."""
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def open_storage(backend='firestore', sqlite_path='fittracker.db', credentials_path='./fit-tracker.json',
+                 pool_size=2, check_interval=60, write_workers=4):
+    """Creates the configured backend, initializing Firebase if needed.
+
+    The backend modules are imported here, so the Firebase SDK is only
+    loaded when Firestore is actually used. Firestore clients come from a
+    pool of pool_size clients, health-checked every check_interval seconds,
+    and imports and bulk deletes commit up to write_workers batches at a time.
+    """
+    if backend == 'sqlite':
+        from sqlite_storage import SqliteStorage
+        return SqliteStorage(sqlite_path)
+    import firebase_admin
+    from firebase_admin import credentials
+    from clients import ClientPool
+    from firestore_storage import FirestoreStorage, new_firestore_client, firestore_healthy
+    # Initialize Firebase (only if not already initialized)
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate(credentials_path))
+    return FirestoreStorage(ClientPool(new_firestore_client, size=pool_size, check=firestore_healthy,
+                                       check_interval=check_interval, close=lambda db: db.close()),
+                            write_workers=write_workers)
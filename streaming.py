@@ -0,0 +1,86 @@
+import io
+import zipfile
+from flask import Response
+
+
+def iter_chunks(data, chunk_size=64 * 1024):
+    """Yields a bytes buffer in fixed-size pieces without copying it whole."""
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield bytes(view[start:start + chunk_size])
+
+
+class ChunkBuffer(io.RawIOBase):
+    """Write-only, unseekable sink that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_zip(files):
+    """Yields a ZIP archive as it is built from (name, bytes) pairs.
+
+    Only the current member is held in memory; the central directory is
+    written at the end.
+    """
+    buffer = ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in files:
+            archive.writestr(name, data)
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def sse_event(data, event=None):
+    """Formats one Server-Sent Event; multi-line data becomes several data lines."""
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    for line in data.split('\n'):
+        lines.append(f"data: {line}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def stream_chunks(response, on_complete):
+    """Yields each chunk of a streaming model response as an SSE event.
+
+    on_complete(text) is called with the assembled text once the stream
+    finishes, before the final 'done' event.
+    """
+    parts = []
+    try:
+        for chunk in response:
+            parts.append(chunk.text)
+            yield sse_event(chunk.text)
+        on_complete(''.join(parts))
+        yield sse_event('', event='done')
+    except Exception as e:
+        print(f"Error streaming generation: {str(e)}")
+        yield sse_event('Could not generate a plan at this time. Please try again later.', event='error')
+
+
+def sse_response(events, on_close=None):
+    """Wraps an event iterator in a text/event-stream response.
+
+    on_close runs when the server closes the response, whether the stream
+    finished or the client disconnected part way through.
+    """
+    response = Response(events, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    if on_close:
+        response.call_on_close(on_close)
+    return response
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# The app runs against the offline model and a throwaway SQLite database
+os.environ.setdefault('FAKE_LLM', '1')
+os.environ.setdefault('STORAGE_BACKEND', 'sqlite')
+os.environ.setdefault('SQLITE_PATH', os.path.join(tempfile.mkdtemp(), 'test.db'))
+os.environ.setdefault('PDF_RENDER_WORKERS', '0')
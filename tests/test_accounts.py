@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+import fake_firestore
+from accounts import USERNAMES, authenticate, create_user
+from fake_firestore import Store
+from storage import UsernameTaken
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(fake_firestore, 'RTT', 0)
+    return Store()
+
+
+def legacy_user(db, username, password='pw'):
+    """A user created before the username index, so without an index document."""
+    ref = db.collection('users').document()
+    ref.set({'username': username, 'password': password})
+    return ref.id
+
+
+def test_username_is_taken_once(db):
+    user_id = create_user(db, 'ann', 'pw')
+    with pytest.raises(UsernameTaken):
+        create_user(db, 'ann', 'other')
+    assert authenticate(db, 'ann', 'pw') == user_id
+    assert authenticate(db, 'ann', 'other') is None
+
+
+def test_unindexed_legacy_username_is_refused(db):
+    user_id = legacy_user(db, 'bob')
+    with pytest.raises(UsernameTaken):
+        create_user(db, 'bob', 'other')
+    # The index now points at the original user, who can still log in
+    assert db.collection(USERNAMES).document('bob').get().to_dict()['user_id'] == user_id
+    assert authenticate(db, 'bob', 'pw') == user_id
+    assert authenticate(db, 'bob', 'other') is None
+
+
+def test_legacy_user_is_indexed_on_login(db):
+    user_id = legacy_user(db, 'cat')
+    assert authenticate(db, 'cat', 'pw') == user_id
+    assert db.collection(USERNAMES).document('cat').get().exists
+
+
+def test_legacy_username_that_cannot_be_indexed_still_logs_in(db):
+    user_id = legacy_user(db, 'dan/smith')
+    assert authenticate(db, 'dan/smith', 'pw') == user_id
+    assert authenticate(db, 'dan/smith', 'other') is None
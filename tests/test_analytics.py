@@ -0,0 +1,27 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+
+def add_entries(storage, user_id, start, weights):
+    for offset, weight in enumerate(weights):
+        storage.add_progress({'user_id': user_id, 'date': start + timedelta(days=offset), 'weight': weight,
+                              'calories_eaten': 2000, 'workout_completed': 'yes'})
+
+
+def test_write_from_another_worker_is_seen():
+    import app
+    storage = app.get_storage()
+    user_id = uuid.uuid4().hex
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    add_entries(storage, user_id, start, [80.0] * 10)
+
+    first = app.user_analytics(user_id, storage.progress_summary(user_id))
+    assert first.figures['logged_days'] == 10
+    assert app.user_analytics(user_id, storage.progress_summary(user_id)) is first
+
+    # Another worker logs more days; this process's cache is not invalidated
+    add_entries(storage, user_id, start + timedelta(days=10), [78.0] * 5)
+
+    second = app.user_analytics(user_id, storage.progress_summary(user_id))
+    assert second is not first
+    assert second.figures['logged_days'] == 15
@@ -0,0 +1,21 @@
+import os
+import subprocess
+import sys
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks', 'check_import_time.py')
+
+
+def check_import_time(*args):
+    return subprocess.run([sys.executable, SCRIPT, *args], capture_output=True, text=True)
+
+
+def test_app_imports_within_budget():
+    # The budget is the script's: IMPORT_BUDGET_MS, or 500 ms
+    result = check_import_time()
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+def test_check_fails_over_budget():
+    result = check_import_time('0')
+    assert result.returncode == 1
+    assert 'over the 0 ms budget' in result.stdout
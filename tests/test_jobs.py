@@ -0,0 +1,44 @@
+import threading
+
+from jobs import JobQueue
+
+
+def test_drain_waits_for_jobs():
+    jobs = JobQueue(workers=2)
+    done = []
+    for i in range(4):
+        jobs.submit(done.append, i)
+    assert jobs.drain(5) == []
+    assert sorted(done) == [0, 1, 2, 3]
+
+
+def test_drain_returns_unfinished_jobs():
+    jobs = JobQueue(workers=1)
+    release = threading.Event()
+    running = jobs.submit(release.wait, 10, owner='a')
+    queued = jobs.submit(lambda: None, owner='b')
+    unfinished = jobs.drain(0.1)
+    assert {(job['id'], job['status'], job['owner']) for job in unfinished} == {
+        (running, 'running', 'a'), (queued, 'queued', 'b')
+    }
+    release.set()
+    assert jobs.drain(5) == []
+
+
+def test_drain_without_jobs_returns_at_once():
+    assert JobQueue().drain(0) == []
+
+
+def test_exiting_worker_marks_unfinished_plans_failed(monkeypatch):
+    import app
+    storage = app.get_storage()
+    user_id = storage.create_user('drain-test', 'pw')
+    storage.write_docs([('user_details', user_id, 'set', {'plan_status': 'generating'})])
+    release = threading.Event()
+    monkeypatch.setattr(app, 'PLAN_DRAIN_TIMEOUT', 0.1)
+    app.plan_jobs.submit(release.wait, 10, owner=user_id)
+
+    app.shutdown_clients()
+
+    assert storage.get_doc('user_details', user_id)['plan_status'] == 'failed'
+    release.set()
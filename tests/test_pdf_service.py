@@ -0,0 +1,111 @@
+import io
+import threading
+import time
+import uuid
+import zipfile
+
+import pytest
+
+import pdf_service
+from pdf_service import PdfRenderService, RenderUnavailable
+
+
+def slow_render(kind, content, profile):
+    """Stands in for render_pdf in the pool's processes."""
+    time.sleep(float(content))
+    return b'%PDF slept ' + content.encode()
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(pdf_service, 'render_pdf', slow_render)
+    service = PdfRenderService(workers=2, timeout=1, max_pending=2)
+    # Both workers are started, so later timings leave out process start-up
+    render_together(service, ['0.2', '0.2'])
+    yield service
+    service.shutdown()
+
+
+def render_together(service, contents, delays=None):
+    """Renders each content from its own thread; returns the results, exceptions included."""
+    results = [None] * len(contents)
+
+    def render(index):
+        time.sleep((delays or [0] * len(contents))[index])
+        try:
+            results[index] = service.render('fitness', contents[index], {})
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=render, args=(index,)) for index in range(len(contents))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_render_in_pool(service):
+    assert service.render('fitness', '0', {}) == b'%PDF slept 0'
+
+
+def test_render_past_the_limit_is_rejected(service):
+    results = render_together(service, ['0.5', '0.5', '0'], delays=[0, 0, 0.2])
+    assert results[:2] == [b'%PDF slept 0.5', b'%PDF slept 0.5']
+    assert isinstance(results[2], RenderUnavailable)
+
+
+def test_renders_succeed_after_a_timeout(service):
+    with pytest.raises(RenderUnavailable):
+        service.render('fitness', '60', {})
+    assert service.render('fitness', '0', {}) == b'%PDF slept 0'
+
+    # The hung render is stopped, so both slots come back
+    deadline = time.monotonic() + 5
+    while True:
+        results = render_together(service, ['0', '0'])
+        if results == [b'%PDF slept 0', b'%PDF slept 0'] or time.monotonic() > deadline:
+            break
+        time.sleep(0.1)
+    assert results == [b'%PDF slept 0', b'%PDF slept 0']
+
+
+def test_timeout_leaves_other_renders_running(service):
+    # The second render is still running when the first one times out
+    results = render_together(service, ['60', '0.6'], delays=[0, 0.7])
+    assert isinstance(results[0], RenderUnavailable)
+    assert results[1] == b'%PDF slept 0.6'
+
+
+@pytest.fixture
+def bundle_client():
+    import app
+    user_id = uuid.uuid4().hex
+    app.get_storage().write_docs([('user_details', user_id, 'set', {
+        'name': 'A', 'plan': f"Plan {user_id}", 'meal_plan': f"Meals {user_id}"
+    })])
+    client = app.app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    return app, client
+
+
+def test_zip_bundle_holds_both_documents(bundle_client):
+    app, client = bundle_client
+    response = client.get('/download_bundle?format=zip')
+    assert response.status_code == 200
+    names = zipfile.ZipFile(io.BytesIO(response.data)).namelist()
+    assert names == ['FitTracker_Workout_Plan.pdf', 'FitTracker_Meal_Plan.pdf', 'progress.csv']
+
+
+def test_busy_renderer_fails_zip_bundle_before_it_starts(bundle_client, monkeypatch):
+    app, client = bundle_client
+
+    def busy(kind, content, user_data):
+        if kind == 'meal':
+            raise RenderUnavailable("Too many PDFs are being rendered")
+        return b'%PDF'
+
+    monkeypatch.setattr(app.pdf_renderer, 'render', busy)
+    response = client.get('/download_bundle?format=zip')
+    assert response.status_code == 503
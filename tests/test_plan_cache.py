@@ -0,0 +1,15 @@
+from plan_cache import normalize_value, plan_cache_key
+
+
+def test_equal_numbers_share_a_key():
+    assert normalize_value(80) == normalize_value(80.0)
+    assert plan_cache_key('workout', {'weight': 80}) == plan_cache_key('workout', {'weight': 80.0})
+
+
+def test_distinct_numbers_keep_distinct_keys():
+    assert normalize_value(72.123456) != normalize_value(72.1234561)
+    assert plan_cache_key('workout', {'weight': 72.123456}) != plan_cache_key('workout', {'weight': 72.1234561})
+
+
+def test_text_is_normalized():
+    assert normalize_value('  Push  Pull\tLegs ') == normalize_value('push pull legs')
@@ -0,0 +1,188 @@
+import time
+from datetime import datetime
+
+from profile_cache import ProfileCache, estimate_size
+from sqlite_storage import SqliteStorage
+from storage import SERVER_TIMESTAMP
+from unit_of_work import UnitOfWork
+
+
+def cached(cache, user_id, data, **kwargs):
+    cache.put(user_id, data, cache.generation(user_id), **kwargs)
+
+
+def test_hit_ratio():
+    cache = ProfileCache()
+    cached(cache, 'a', {'name': 'A'})
+    assert cache.lookup('a') == (True, {'name': 'A'})
+    assert cache.lookup('a') == (True, {'name': 'A'})
+    assert cache.lookup('b') == (False, None)
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (2, 1)
+    assert stats['hit_ratio'] == 2 / 3
+
+
+def test_missing_document_is_cached():
+    cache = ProfileCache()
+    cached(cache, 'a', None)
+    assert cache.lookup('a') == (True, None)
+
+
+def test_memory_stays_within_max_bytes():
+    doc = {'plan': 'x' * 1000}
+    size = estimate_size(doc)
+    cache = ProfileCache(max_bytes=size * 10)
+    for i in range(50):
+        cached(cache, f"user{i}", doc)
+        assert cache.stats()['bytes'] <= cache.max_bytes
+    stats = cache.stats()
+    assert stats['entries'] == 10
+    assert stats['evictions'] == 40
+    # Least recently used entries go first
+    assert cache.lookup('user49')[0]
+    assert not cache.lookup('user0')[0]
+
+
+def test_lookup_refreshes_recency():
+    doc = {'plan': 'x' * 1000}
+    cache = ProfileCache(max_bytes=estimate_size(doc) * 2)
+    cached(cache, 'a', doc)
+    cached(cache, 'b', doc)
+    cache.lookup('a')
+    cached(cache, 'c', doc)
+    assert cache.lookup('a')[0]
+    assert not cache.lookup('b')[0]
+
+
+def test_entry_larger_than_cache_is_not_stored():
+    cache = ProfileCache(max_bytes=100)
+    cached(cache, 'a', {'plan': 'x' * 1000})
+    assert cache.stats()['bytes'] == 0
+    assert not cache.lookup('a')[0]
+
+
+def test_entries_expire_after_ttl():
+    cache = ProfileCache(ttl=0.05)
+    cached(cache, 'a', {'name': 'A'})
+    assert cache.lookup('a')[0]
+    time.sleep(0.1)
+    assert cache.lookup('a') == (False, None)
+    assert cache.stats()['entries'] == 0
+
+
+def test_invalidate_drops_entry():
+    cache = ProfileCache()
+    cached(cache, 'a', {'name': 'A'})
+    cache.invalidate('a')
+    assert not cache.lookup('a')[0]
+    assert cache.stats()['bytes'] == 0
+
+
+def test_read_racing_a_write_is_not_cached():
+    cache = ProfileCache()
+    generation = cache.generation('a')
+    # The write lands while the read is in flight
+    cache.invalidate('a')
+    cache.put('a', {'name': 'old'}, generation)
+    assert not cache.lookup('a')[0]
+    # A read started after the write is cached
+    cached(cache, 'a', {'name': 'new'})
+    assert cache.lookup('a') == (True, {'name': 'new'})
+
+
+def test_invalidations_are_forgotten():
+    cache = ProfileCache(max_read_seconds=0.05)
+    for i in range(1000):
+        cache.invalidate(f"user{i}")
+    assert cache.stats()['invalidations'] == 1000
+    time.sleep(0.1)
+    cache.invalidate('last')
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_slow_read_is_not_cached():
+    cache = ProfileCache(max_read_seconds=0.05)
+    generation = cache.generation('a')
+    time.sleep(0.1)
+    cache.put('a', {'name': 'A'}, generation)
+    assert not cache.lookup('a')[0]
+
+
+def test_store_supersedes_reads_in_flight():
+    cache = ProfileCache()
+    generation = cache.generation('a')
+    cache.store('a', {'name': 'new'})
+    cache.put('a', {'name': 'old'}, generation)
+    assert cache.lookup('a') == (True, {'name': 'new'})
+
+
+class CountingStorage(SqliteStorage):
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.doc_reads = 0
+
+    def get_doc(self, collection, doc_id):
+        self.doc_reads += 1
+        return super().get_doc(collection, doc_id)
+
+
+def test_hit_makes_no_storage_read(tmp_path):
+    storage = CountingStorage(str(tmp_path / 'app.db'))
+    storage.write_docs([('user_details', 'u', 'set', {'name': 'A'})])
+    cache = ProfileCache()
+    first, second = UnitOfWork(storage, caches={'user_details': cache}), UnitOfWork(storage, caches={'user_details': cache})
+    assert first.get('user_details', 'u') == {'name': 'A'}
+    assert second.get('user_details', 'u') == {'name': 'A'}
+    assert (first.reads, second.reads, storage.doc_reads) == (1, 0, 1)
+
+
+def test_commit_writes_through(tmp_path):
+    storage = CountingStorage(str(tmp_path / 'app.db'))
+    cache = ProfileCache()
+    uow = UnitOfWork(storage, caches={'user_details': cache})
+    uow.set('user_details', 'u', {'name': 'A', 'updated_at': SERVER_TIMESTAMP})
+    uow.commit()
+    uow = UnitOfWork(storage, caches={'user_details': cache})
+    assert uow.get('user_details', 'u')['name'] == 'A'
+    uow.update('user_details', 'u', {'plan_status': 'generating'})
+    uow.commit()
+
+    data = UnitOfWork(storage, caches={'user_details': cache}).get('user_details', 'u')
+    assert storage.doc_reads == 0
+    assert data['plan_status'] == 'generating'
+    assert isinstance(data['updated_at'], datetime)
+
+
+def test_update_of_unread_document_invalidates(tmp_path):
+    storage = CountingStorage(str(tmp_path / 'app.db'))
+    storage.write_docs([('user_details', 'u', 'set', {'name': 'A'})])
+    cache = ProfileCache()
+    cached(cache, 'u', {'name': 'A'})
+    uow = UnitOfWork(storage, caches={'user_details': cache})
+    uow.update('user_details', 'u', {'plan_status': 'ready'})
+    uow.commit()
+    assert not cache.lookup('u')[0]
+
+
+def test_fresh_read_sees_another_workers_write(tmp_path):
+    """Two workers, each with its own cache, share one database."""
+    storage = CountingStorage(str(tmp_path / 'app.db'))
+    worker_a, worker_b = ProfileCache(), ProfileCache()
+    uow = UnitOfWork(storage, caches={'user_details': worker_a})
+    uow.set('user_details', 'u', {'plan_status': 'generating'})
+    uow.commit()
+
+    def read(cache, fresh=False):
+        uow = UnitOfWork(storage, caches={'user_details': cache})
+        return uow.get('user_details', 'u', fresh=fresh)['plan_status'], uow.reads
+
+    assert read(worker_b) == ('generating', 1)
+    # Worker A's job finishes the plan; only its own cache sees the write
+    storage.write_docs([('user_details', 'u', 'update', {'plan_status': 'ready'})])
+    worker_a.invalidate('u')
+
+    assert read(worker_b) == ('generating', 0)
+    assert read(worker_b, fresh=True) == ('ready', 1)
+    # The fresh read refreshed worker B's entry
+    assert read(worker_b) == ('ready', 0)
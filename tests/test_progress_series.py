@@ -0,0 +1,122 @@
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from progress_series import ProgressSeries, day_date, epoch_day
+
+START = datetime(2024, 1, 1, 7, 30)
+DONE = ['yes', 'no', ' True ', None, 'completed', '', 'ON', '1', 'skipped', 'Yes']
+
+
+def entries(count=10):
+    return [{'date': START + timedelta(days=day), 'weight': 80.0 - day * 0.5, 'calories_eaten': 2000 + day,
+             'workout_completed': DONE[day % len(DONE)]} for day in range(count)]
+
+
+def assert_unchanged(series, count):
+    """No column grew, so the next entry lines up across the columns."""
+    assert len(series) == count
+    assert series.nbytes == count * 12 + (count + 7) // 8
+    series.append(START + timedelta(days=9), 70.0, 1800, 'yes')
+    assert day_date(series.days()[-1]) == date(2024, 1, 10)
+    assert series.weights()[-1] == 70.0 and series.calories()[-1] == 1800 and series.workouts()[-1]
+
+
+@pytest.fixture
+def local_time_behind_utc(monkeypatch):
+    # POSIX form, so no zoneinfo files are needed: UTC-12, where 23:30 local is the next day in UTC
+    monkeypatch.setenv('TZ', 'XXX+12')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_naive_datetimes_are_utc(local_time_behind_utc):
+    late = datetime(2024, 1, 1, 23, 30)
+    assert epoch_day(late) == epoch_day(late.replace(tzinfo=timezone.utc)) == epoch_day(date(2024, 1, 1))
+    assert day_date(epoch_day(late)) == date(2024, 1, 1)
+
+
+def test_aware_datetimes_use_their_utc_day():
+    east = timezone(timedelta(hours=10))
+    assert day_date(epoch_day(datetime(2024, 1, 2, 5, 0, tzinfo=east))) == date(2024, 1, 1)
+
+
+def test_from_entries_columns():
+    series = ProgressSeries.from_entries(entries())
+    assert len(series) == 10
+    assert day_date(series.days()[0]) == START.date()
+    assert series.weights().dtype == np.float32
+    assert series.weights().tolist() == [80.0 - day * 0.5 for day in range(10)]
+    assert series.calories().tolist() == [2000 + day for day in range(10)]
+
+
+def test_workout_bitset_spans_bytes():
+    series = ProgressSeries.from_entries(entries(20))
+    expected = [value is not None and value.strip().lower() in ('yes', 'true', 'on', '1', 'completed')
+                for value in (DONE * 2)]
+    assert series.workouts().tolist() == expected
+    assert series.nbytes == 20 * 12 + 3
+
+
+def test_append_matches_from_entries():
+    series = ProgressSeries()
+    for entry in entries(20):
+        series.append(entry['date'], entry['weight'], entry['calories_eaten'], entry['workout_completed'])
+    built = ProgressSeries.from_entries(entries(20))
+    for column in ('days', 'weights', 'calories', 'workouts'):
+        assert getattr(series, column)().tolist() == getattr(built, column)().tolist()
+
+
+def test_append_out_of_order_is_rejected():
+    series = ProgressSeries.from_entries(entries(3))
+    with pytest.raises(ValueError):
+        series.append(START, 70.0, 1800)
+    assert len(series) == 3
+    with pytest.raises(ValueError):
+        ProgressSeries.from_entries(entries(3)[::-1])
+
+
+def test_append_with_bad_value_changes_nothing():
+    series = ProgressSeries.from_entries(entries(3))
+    with pytest.raises(TypeError):
+        series.append(START + timedelta(days=5), 'heavy', 1800)
+    with pytest.raises(ValueError):
+        series.append(START + timedelta(days=5), 70.0, 'lots')
+    assert_unchanged(series, 3)
+
+
+def test_append_while_a_column_is_exported_changes_nothing():
+    series = ProgressSeries.from_entries(entries(3))
+    weights = series.weights()
+    with pytest.raises(BufferError):
+        series.append(START + timedelta(days=5), 70.0, 1800)
+    del weights
+    assert_unchanged(series, 3)
+
+
+def test_between_is_inclusive_and_shares_buffers():
+    series = ProgressSeries.from_entries(entries(10))
+    view = series.between(date(2024, 1, 3), date(2024, 1, 5))
+    assert len(view) == 3
+    assert [day_date(day) for day in view.days()] == [date(2024, 1, 3), date(2024, 1, 4), date(2024, 1, 5)]
+    assert view.calories().tolist() == [2002, 2003, 2004]
+    assert view.workouts().tolist() == series.workouts().tolist()[2:5]
+    assert np.shares_memory(view.weights(), series.weights())
+    assert view.nbytes == series.nbytes
+
+
+def test_view_of_a_view_and_empty_ranges():
+    series = ProgressSeries.from_entries(entries(10))
+    view = series.between(START, START + timedelta(days=5)).between(date(2024, 1, 5), date(2024, 2, 1))
+    assert [day_date(day) for day in view.days()] == [date(2024, 1, 5), date(2024, 1, 6)]
+    assert len(series.between(date(2023, 1, 1), date(2023, 12, 31))) == 0
+
+
+def test_view_cannot_be_appended_to():
+    view = ProgressSeries.from_entries(entries(3)).between(START, START + timedelta(days=1))
+    with pytest.raises(ValueError):
+        view.append(START + timedelta(days=5), 70.0, 1800)
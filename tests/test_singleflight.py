@@ -0,0 +1,144 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+from llm import FAKE_PLAN_TEXT, FakeGenerativeModel
+from singleflight import SingleFlight
+
+CALLERS = 8
+
+
+def run_concurrently(func, count=CALLERS):
+    """Calls func from count threads released at once; returns results and errors."""
+    barrier = threading.Barrier(count)
+    results, errors = [], []
+
+    def call():
+        barrier.wait()
+        try:
+            results.append(func())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results, errors
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'result'
+
+    results, errors = run_concurrently(lambda: flights.do('key', work))
+    assert len(calls) == 1
+    assert results == ['result'] * CALLERS
+    assert not errors
+    assert flights.in_flight() == 0
+
+
+def test_error_reaches_every_waiting_caller():
+    flights = SingleFlight()
+    calls = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.2)
+        raise ValueError('upstream failed')
+
+    results, errors = run_concurrently(lambda: flights.do('key', work))
+    assert len(calls) == 1
+    assert not results
+    assert len(errors) == CALLERS
+    assert all(isinstance(e, ValueError) for e in errors)
+
+
+def test_different_keys_run_separately():
+    flights = SingleFlight()
+    calls = []
+
+    def work(key):
+        calls.append(key)
+        time.sleep(0.1)
+        return key
+
+    counter = iter(range(CALLERS))
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            key = next(counter) % 2
+        return flights.do(key, lambda: work(key))
+
+    results, errors = run_concurrently(call)
+    assert sorted(set(calls)) == [0, 1]
+    assert len(calls) == 2
+    assert sorted(results) == [0] * (CALLERS // 2) + [1] * (CALLERS // 2)
+
+
+def test_waiter_times_out():
+    flights = SingleFlight()
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.5)
+        return 'late'
+
+    leader = threading.Thread(target=lambda: flights.do('key', slow))
+    leader.start()
+    started.wait(5)
+    with pytest.raises(TimeoutError):
+        flights.do('key', slow, timeout=0.05)
+    leader.join()
+
+
+def test_concurrent_plan_generations_make_one_upstream_call(monkeypatch):
+    monkeypatch.setenv('FAKE_LLM_DELAY', '0.3')
+    import app
+    # A split no other test uses, so the plan cache cannot answer
+    user_details = {'height': 180, 'weight': 80, 'work_type': 'desk', 'goal': 'lose',
+                    'current_calories': 2000, 'workout_split': uuid.uuid4().hex}
+    before = FakeGenerativeModel.calls
+
+    results, errors = run_concurrently(lambda: app.generate_workout_plan(user_details))
+
+    assert FakeGenerativeModel.calls - before == 1
+    assert results == [FAKE_PLAN_TEXT] * CALLERS
+    assert not errors
+    # Later callers are answered by the plan cache
+    assert app.generate_workout_plan(user_details) == FAKE_PLAN_TEXT
+    assert FakeGenerativeModel.calls - before == 1
+
+
+def test_plan_cached_after_the_first_check_is_not_regenerated(monkeypatch):
+    import app
+    user_details = {'height': 180, 'weight': 80, 'work_type': 'desk', 'goal': 'lose',
+                    'current_calories': 2000, 'workout_split': uuid.uuid4().hex}
+    inputs = app.workout_plan_inputs(user_details)
+    # The leader of an earlier flight caches the plan after this request's first check
+    lookups = []
+    real_get = app.plan_cache.get
+
+    def get(kind, key_inputs):
+        lookups.append(kind)
+        if len(lookups) == 1:
+            app.plan_cache.set(kind, key_inputs, 'cached plan')
+            return None
+        return real_get(kind, key_inputs)
+
+    monkeypatch.setattr(app.plan_cache, 'get', get)
+    before = FakeGenerativeModel.calls
+
+    assert app.generate_workout_plan(user_details) == 'cached plan'
+    assert FakeGenerativeModel.calls == before
+    assert app.plan_cache.get('workout', inputs) == 'cached plan'
@@ -0,0 +1,111 @@
+import uuid
+
+import pytest
+
+from llm import FakeResponse
+from streaming import sse_event
+
+CHUNKS = ['Monday: Upper Body\n', 'Wednesday: Lower Body\n', 'Friday: Full Body\n']
+
+
+class FakeStream:
+    """A streaming model response that records how far it was read and whether it was closed."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.sent = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            if self.closed:
+                return
+            self.sent += 1
+            yield FakeResponse(chunk)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeStreamingModel:
+
+    def __init__(self):
+        self.streams = []
+
+    def generate_content(self, prompt, stream=False):
+        assert stream
+        self.streams.append(FakeStream(CHUNKS))
+        return self.streams[-1]
+
+
+@pytest.fixture
+def streaming(monkeypatch):
+    import app
+    model = FakeStreamingModel()
+    closed = []
+
+    def close_stream(response):
+        closed.append(response)
+        response.close()
+
+    monkeypatch.setattr(app, 'get_model', lambda name: model)
+    monkeypatch.setattr(app, 'close_stream', close_stream)
+
+    user_id = uuid.uuid4().hex
+    # A split no other test uses, so the plan cache cannot answer
+    app.get_storage().write_docs([('user_details', user_id, 'set', {
+        'height': 180, 'weight': 80, 'work_type': 'desk', 'goal': 'lose',
+        'current_calories': 2000, 'workout_split': uuid.uuid4().hex
+    })])
+    client = app.app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    return app, client, user_id, model, closed
+
+
+def test_stream_sends_chunks_then_done_and_saves_the_plan(streaming):
+    app, client, user_id, model, closed = streaming
+    in_flight = app.generation_limiter.stats()['in_flight']
+
+    response = client.get('/stream/plan')
+
+    assert response.mimetype == 'text/event-stream'
+    body = response.get_data(as_text=True)
+    # As the WSGI server does once the body is sent
+    response.close()
+    assert body == ''.join(sse_event(chunk) for chunk in CHUNKS) + sse_event('', event='done')
+    plan = app.get_storage().get_doc('user_details', user_id)
+    assert plan['plan'] == ''.join(CHUNKS)
+    assert plan['plan_status'] == 'ready'
+    assert closed == model.streams
+    assert app.generation_limiter.stats()['in_flight'] == in_flight
+
+
+def test_cached_plan_is_sent_as_one_event(streaming):
+    app, client, user_id, model, closed = streaming
+    first = client.get('/stream/plan')
+    first.get_data()
+    first.close()
+
+    body = client.get('/stream/plan').get_data(as_text=True)
+
+    assert body == sse_event(''.join(CHUNKS)) + sse_event('', event='done')
+    assert len(model.streams) == 1
+
+
+def test_client_disconnect_releases_the_slot_and_closes_the_stream(streaming):
+    app, client, user_id, model, closed = streaming
+    in_flight = app.generation_limiter.stats()['in_flight']
+
+    response = client.get('/stream/plan', buffered=False)
+    events = iter(response.response)
+    assert next(events) == sse_event(CHUNKS[0]).encode()
+    assert app.generation_limiter.stats()['in_flight'] == in_flight + 1
+    # The client goes away after the first chunk; the server closes the response
+    response.close()
+
+    assert closed == model.streams
+    assert model.streams[0].closed
+    assert model.streams[0].sent == 1
+    assert app.generation_limiter.stats()['in_flight'] == in_flight
+    assert 'plan' not in app.get_storage().get_doc('user_details', user_id)
@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+from storage import SERVER_TIMESTAMP
+
+
+def written_copy(data):
+    """The document as stored by a write of data, with server timestamps filled in locally."""
+    now = datetime.now(timezone.utc)
+    return {key: now if value is SERVER_TIMESTAMP else value for key, value in data.items()}
+
+
+class UnitOfWork:
+    """Request-scoped document cache and write buffer.
+
+    Each document is read from storage at most once; sets and updates are
+    applied to the cached copy and buffered until commit(), which sends them
+    all in a single atomic write.
+
+    caches maps a collection name to a shared cache (see ProfileCache) that
+    is consulted before storage. On commit, documents whose whole content
+    is known here (set, or read and then updated) are written through to
+    it; the others are invalidated.
+    """
+
+    def __init__(self, storage, caches=None):
+        self.storage = storage
+        self.caches = caches or {}
+        self.docs = {}
+        self.pending = {}
+        self.reads = 0
+        self.writes = 0
+        self.commits = 0
+
+    def get(self, collection, doc_id, fresh=False):
+        """Returns the document as a dict, or None if it does not exist.
+
+        fresh skips the shared cache, for reads that must see writes made
+        by other workers; what is read still refreshes the cache.
+        """
+        key = (collection, doc_id)
+        if key not in self.docs:
+            cache = self.caches.get(collection)
+            hit, data = cache.lookup(doc_id) if cache and not fresh else (False, None)
+            if not hit:
+                generation = cache.generation(doc_id) if cache else None
+                data = self.storage.get_doc(collection, doc_id)
+                self.reads += 1
+                if cache:
+                    cache.put(doc_id, data, generation)
+            self.docs[key] = dict(data) if data is not None else None
+        data = self.docs[key]
+        return dict(data) if data is not None else None
+
+    def set(self, collection, doc_id, data):
+        key = (collection, doc_id)
+        self.docs[key] = dict(data)
+        self.pending[key] = ('set', dict(data))
+
+    def update(self, collection, doc_id, data):
+        key = (collection, doc_id)
+        if self.docs.get(key) is not None:
+            self.docs[key].update(data)
+        op, fields = self.pending.get(key, ('update', {}))
+        self.pending[key] = (op, {**fields, **data})
+
+    def commit(self):
+        """Writes all buffered mutations at once. Safe to call more than once."""
+        if not self.pending:
+            return
+        self.storage.write_docs([
+            (collection, doc_id, op, data) for (collection, doc_id), (op, data) in self.pending.items()
+        ])
+        for key in self.pending:
+            collection, doc_id = key
+            if collection in self.caches:
+                if self.docs.get(key) is not None:
+                    self.caches[collection].store(doc_id, written_copy(self.docs[key]))
+                else:
+                    self.caches[collection].invalidate(doc_id)
+        self.writes += len(self.pending)
+        self.commits += 1
+        self.pending = {}